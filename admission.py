@@ -0,0 +1,160 @@
+import asyncio
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+from settings import settings
+from user.jwt_auth import JWTAuth
+
+
+jwt_auth = JWTAuth()
+
+
+class AdmissionGroup:
+    """
+    Concurrency limit with a bounded FIFO wait queue and a priority lane in front of it.
+
+    A request is shed straight away when the queue is full or when the expected wait,
+    estimated from the recent service time, is already past the group's latency budget.
+    Requests that do queue are shed once they have waited for the whole budget.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue: int, budget_ms: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.budget = budget_ms / 1000
+        self.active = 0
+        self.admitted = 0
+        self.shed = 0
+        self.service_time = 0.0
+        self._waiters = deque()
+        self._priority = deque()
+
+    @property
+    def queued(self):
+        return len(self._waiters) + len(self._priority)
+
+    async def acquire(self, priority: bool = False) -> bool:
+        if self.active < self.concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        # The priority lane is served first, so its waiters only queue behind each other.
+        lane = self._priority if priority else self._waiters
+        ahead = len(lane) if priority else self.queued
+        expected_wait = (ahead + 1) * self.service_time / self.concurrency
+        if len(lane) >= self.queue or expected_wait > self.budget:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.budget)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # The slot was handed over just as the client went away.
+                self._hand_over()
+            raise
+        finally:
+            if waiter in lane:
+                lane.remove(waiter)
+        self.admitted += 1
+        return True
+
+    def release(self, elapsed: float):
+        self.service_time = elapsed if not self.service_time else 0.9 * self.service_time + 0.1 * elapsed
+        self._hand_over()
+
+    def _hand_over(self):
+        for lane in (self._priority, self._waiters):
+            while lane:
+                waiter = lane.popleft()
+                if not waiter.done():
+                    # Hand the slot straight to the waiter; ``active`` stays the same.
+                    waiter.set_result(None)
+                    return
+        self.active -= 1
+
+    def snapshot(self):
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "service_time_ms": round(self.service_time * 1000, 2),
+        }
+
+
+def _group(name: str, limits: dict) -> AdmissionGroup:
+    if name == "websockets":
+        # Open websockets must never be able to take the whole pool away from HTTP requests.
+        limits = {**limits, "concurrency": min(limits["concurrency"], settings.DB_POOL_SIZE - 1)}
+    return AdmissionGroup(name, **limits)
+
+
+groups = {name: _group(name, limits) for name, limits in settings.ADMISSION_GROUPS.items()}
+
+
+def route_group(scope) -> str:
+    # Websockets and Server-Sent Event streams hold their slot for as long as they are open.
+    if scope["type"] == "websocket":
+        return "websockets"
+    if scope["path"].startswith(tuple(settings.ADMISSION_STREAM_PREFIXES)):
+        return "streams"
+    if scope["path"] in settings.ADMISSION_AUTH_PATHS:
+        return "auth"
+    if scope["method"] in ("GET", "HEAD", "OPTIONS"):
+        return "reads"
+    return "writes"
+
+
+def is_staff(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            payload = jwt_auth.decode_token(token) if scheme == "Bearer" else None
+            return bool(payload and payload.get("staff"))
+    return False
+
+
+class AdmissionMiddleware:
+    """
+    Admission control per route group (auth, reads, writes, websockets, streams), so a slow
+    database degrades each group on its own budget instead of queueing everything in
+    ``get_db()``. Shed HTTP requests get a fast ``503``; shed websockets are closed
+    with code 1013 (try again later). Writes from staff tokens take the priority lane.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        group = groups[route_group(scope)]
+        priority = group.name == "writes" and is_staff(scope)
+        if not await group.acquire(priority):
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1013})
+                return
+            response = JSONResponse(
+                {"detail": "Server is busy, try again later"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release(time.monotonic() - started)
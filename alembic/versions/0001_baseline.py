@@ -0,0 +1,134 @@
+"""Baseline: the schema as it was before migrations were added
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+Databases created earlier already have these tables and are left as they are; an empty
+database gets them here, so ``alembic upgrade head`` works for both.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _exists() -> bool:
+    if op.get_context().as_sql:
+        # Offline SQL is for a fresh database.
+        return False
+    return sa.inspect(op.get_bind()).has_table("users")
+
+
+def upgrade() -> None:
+    if _exists():
+        return
+
+    op.create_table(
+        "users",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("full_name", sa.String(255), nullable=False),
+        sa.Column("phone_number", sa.String(255), nullable=False),
+        sa.Column("status", sa.Boolean(), nullable=False),
+        sa.Column("password", sa.String(60), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "categories",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(250), nullable=False, unique=True),
+        sa.Column("created_by_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_table(
+        "regions",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(250), nullable=False, unique=True),
+        sa.Column("created_by_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_table(
+        "locations",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(250), nullable=False, unique=True),
+        sa.Column("created_by_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("region_id", UUID(as_uuid=True), sa.ForeignKey("regions.id"), nullable=False),
+    )
+    op.create_table(
+        "universities",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+        sa.Column("photo", sa.String(255), nullable=True),
+        sa.Column("location_id", UUID(as_uuid=True), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("category_id", UUID(as_uuid=True), sa.ForeignKey("categories.id"), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("video", sa.String(255), nullable=True),
+        sa.Column("amount_of_students", sa.Integer(), nullable=False),
+        sa.Column("phone_number", sa.String(20), nullable=False, unique=True),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("webpage", sa.String(255), nullable=False),
+        sa.Column("created_by_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_table(
+        "departments",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+        sa.Column("photo", sa.String(255), nullable=True),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("university_id", UUID(as_uuid=True), sa.ForeignKey("universities.id"), nullable=False),
+    )
+    op.create_table(
+        "deteriorations",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+        sa.Column("department_id", UUID(as_uuid=True), sa.ForeignKey("departments.id"), nullable=False),
+        sa.Column("photo", sa.String(255), nullable=True),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("number_of_students", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "students",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("lastname", sa.String(100), nullable=False),
+        sa.Column("photo", sa.String(), nullable=True),
+        sa.Column("deterioration_id", UUID(as_uuid=True), sa.ForeignKey("deteriorations.id"), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("working_place", sa.String(250), nullable=True),
+        sa.Column("achievements", sa.String(), nullable=True),
+    )
+    op.create_table(
+        "news",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("photo", sa.String(255), nullable=True),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("created_by_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_table(
+        "comments",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("body", sa.String(), nullable=False),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("university_id", UUID(as_uuid=True), sa.ForeignKey("universities.id"), nullable=False),
+    )
+    op.create_table(
+        "carts",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("university_id", UUID(as_uuid=True), sa.ForeignKey("universities.id"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for table in ("carts", "comments", "news", "students", "deteriorations", "departments", "universities",
+                  "locations", "regions", "categories", "users"):
+        op.drop_table(table)
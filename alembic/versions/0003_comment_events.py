@@ -0,0 +1,38 @@
+"""Comment events shared between workers
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "comment_events",
+        sa.Column("id", sa.BigInteger, sa.Identity(), primary_key=True),
+        sa.Column("university_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("event", sa.String(20), nullable=False),
+        sa.Column("data", sa.Text, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_comment_events_university_id_id", "comment_events", ["university_id", "id"])
+    op.create_index("ix_comment_events_created_at", "comment_events", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_comment_events_created_at", table_name="comment_events")
+    op.drop_index("ix_comment_events_university_id_id", table_name="comment_events")
+    op.drop_table("comment_events")
@@ -0,0 +1,47 @@
+"""Stored news excerpts
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 10:20:00
+
+Existing rows are backfilled with the SQL equivalent of ``news.models.make_excerpt``,
+so the migration also works as offline SQL.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EXCERPT_LENGTH = 280
+
+
+def upgrade() -> None:
+    op.add_column("news", sa.Column("excerpt", sa.String(EXCERPT_LENGTH), server_default="", nullable=False))
+    # Collapse whitespace; longer texts are cut before the last word that fits, stripped of
+    # trailing punctuation and ended with an ellipsis.
+    op.execute(
+        sa.text(
+            """
+            WITH collapsed AS (
+                SELECT id, btrim(regexp_replace(body, '\\s+', ' ', 'g')) AS text FROM news
+            )
+            UPDATE news SET excerpt = CASE
+                WHEN char_length(collapsed.text) <= :length THEN collapsed.text
+                ELSE rtrim(regexp_replace(left(collapsed.text, :length - 1), ' [^ ]*$', ''), '.,;:!?-') || '…'
+            END
+            FROM collapsed
+            WHERE news.id = collapsed.id
+            """
+        ).bindparams(length=EXCERPT_LENGTH)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("news", "excerpt")
@@ -0,0 +1,55 @@
+"""Student search: the weighted search vector, its indexes and the joins it walks
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 10:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram operator classes for typo-tolerant name matching.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "students",
+        sa.Column(
+            "search_vector",
+            TSVECTOR,
+            sa.Computed(
+                "setweight(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(lastname, '')), 'A')"
+                " || setweight(to_tsvector('simple', coalesce(working_place, '')), 'B')"
+                " || setweight(to_tsvector('simple', coalesce(achievements, '')), 'C')",
+                persisted=True,
+            ),
+        ),
+    )
+    op.create_index("ix_students_search_vector", "students", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_students_name_trgm", "students", ["name", "lastname"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops", "lastname": "gin_trgm_ops"},
+    )
+    op.create_index("ix_students_deterioration_id", "students", ["deterioration_id"])
+    op.create_index("ix_deteriorations_department_id", "deteriorations", ["department_id"])
+    op.create_index("ix_departments_university_id", "departments", ["university_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_departments_university_id", table_name="departments")
+    op.drop_index("ix_deteriorations_department_id", table_name="deteriorations")
+    op.drop_index("ix_students_deterioration_id", table_name="students")
+    op.drop_index("ix_students_name_trgm", table_name="students")
+    op.drop_index("ix_students_search_vector", table_name="students")
+    op.drop_column("students", "search_vector")
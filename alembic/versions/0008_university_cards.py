@@ -0,0 +1,45 @@
+"""University card read model
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 11:20:00
+
+Cards of existing universities are built by the rebuild job, queued from
+``POST /university_cards/rebuild/``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "university_cards",
+        sa.Column("university_id", UUID(as_uuid=True), sa.ForeignKey("universities.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("category_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("location_id", UUID(as_uuid=True), nullable=False),
+        sa.Column("card", JSONB, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_university_cards_name", "university_cards", ["name"])
+    op.create_index("ix_university_cards_category_name", "university_cards", ["category_id", "name"])
+    op.create_index("ix_university_cards_location_name", "university_cards", ["location_id", "name"])
+    # The comment and cart counts on each card.
+    op.create_index("ix_comments_university_id", "comments", ["university_id"])
+    op.create_index("ix_carts_university_id", "carts", ["university_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_carts_university_id", table_name="carts")
+    op.drop_index("ix_comments_university_id", table_name="comments")
+    op.drop_table("university_cards")
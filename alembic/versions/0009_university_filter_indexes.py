@@ -0,0 +1,27 @@
+"""Indexes for filtering universities by category and location
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 11:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_universities_category_id", "universities", ["category_id"])
+    op.create_index("ix_universities_location_id", "universities", ["location_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_universities_location_id", table_name="universities")
+    op.drop_index("ix_universities_category_id", table_name="universities")
@@ -0,0 +1,51 @@
+"""University popularity and the cart and comment times it decays by
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 12:00:00
+
+Existing carts and comments get the time of the migration, as when they were made was
+never recorded, so they start out weighing the same. Scores are seeded from them here
+with the formula of ``univer.popularity``; later changes keep them up to date.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# univer.popularity.ANCHOR, 2024-01-01 UTC.
+ANCHOR_EPOCH = 1704067200
+
+
+def upgrade() -> None:
+    op.add_column("carts", sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column("comments", sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column("universities", sa.Column("popularity", sa.Float(), server_default="0", nullable=False))
+    # Constants are inlined rather than bound so the driver does not have to guess numeric types.
+    score = "coalesce(sum({weight!r} * power(2.0, (extract(epoch FROM {table}.created_at) - {anchor}) / {half_life!r})), 0.0)"
+    half_life = float(settings.POPULARITY_HALF_LIFE_DAYS * 86400)
+    carts = score.format(weight=float(settings.POPULARITY_CART_WEIGHT), table="carts", anchor=ANCHOR_EPOCH, half_life=half_life)
+    comments = score.format(weight=float(settings.POPULARITY_COMMENT_WEIGHT), table="comments", anchor=ANCHOR_EPOCH,
+                            half_life=half_life)
+    op.execute(
+        f"UPDATE universities SET popularity ="
+        f" (SELECT {carts} FROM carts WHERE carts.university_id = universities.id)"
+        f" + (SELECT {comments} FROM comments WHERE comments.university_id = universities.id)"
+    )
+    op.create_index("ix_universities_popularity", "universities", [sa.text("popularity DESC"), "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_universities_popularity", table_name="universities")
+    op.drop_column("universities", "popularity")
+    op.drop_column("comments", "created_at")
+    op.drop_column("carts", "created_at")
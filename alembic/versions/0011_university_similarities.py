@@ -0,0 +1,41 @@
+"""University similarities from cart co-occurrence
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 12:20:00
+
+Similarities of existing carts are built by the rebuild job, queued from
+``POST /university_similar/rebuild/``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "university_similarities",
+        sa.Column("university_id", UUID(as_uuid=True), sa.ForeignKey("universities.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("similar_id", UUID(as_uuid=True), sa.ForeignKey("universities.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("score", sa.Float(), nullable=False),
+    )
+    op.create_index(
+        "ix_university_similarities_university_score", "university_similarities", ["university_id", sa.text("score DESC")]
+    )
+    # Lets deleting a university's cascade find the rows that point at it.
+    op.create_index("ix_university_similarities_similar_id", "university_similarities", ["similar_id"])
+    op.create_index("ix_carts_user_id", "carts", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_carts_user_id", table_name="carts")
+    op.drop_table("university_similarities")
@@ -0,0 +1,30 @@
+"""Coordinates of locations and universities
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 12:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("locations", "universities"):
+        op.add_column(table, sa.Column("latitude", sa.Float(), nullable=True))
+        op.add_column(table, sa.Column("longitude", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ("universities", "locations"):
+        op.drop_column(table, "longitude")
+        op.drop_column(table, "latitude")
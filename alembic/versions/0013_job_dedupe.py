@@ -0,0 +1,32 @@
+"""Dedupe keys of pending jobs
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 16:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("dedupe_key", sa.String(200), nullable=True))
+    # One pending job per name and key; retried and running jobs are left out.
+    op.create_index(
+        "ix_jobs_pending_dedupe_key", "jobs", ["name", "dedupe_key"], unique=True,
+        postgresql_where=sa.text("status = 'queued' AND attempts = 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_pending_dedupe_key", table_name="jobs")
+    op.drop_column("jobs", "dedupe_key")
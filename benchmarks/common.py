@@ -0,0 +1,53 @@
+"""Helpers shared by the benchmark scripts: timing, summaries and budget checks."""
+import statistics
+import sys
+import time
+
+
+def measure(fn, runs: int) -> list:
+    """Call ``fn`` ``runs`` times and return each call's duration in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def measure_async(fn, runs: int) -> list:
+    """Await ``fn()`` ``runs`` times and return each call's duration in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summary(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def report(name: str, samples: list) -> dict:
+    stats = summary(samples)
+    print(f"{name:<40} runs={stats['runs']:<6} mean={stats['mean']:9.3f} ms  p50={stats['p50']:9.3f} ms"
+          f"  p95={stats['p95']:9.3f} ms  max={stats['max']:9.3f} ms")
+    return stats
+
+
+def check_budget(results: dict, budget_ms: float, key: str = "p95"):
+    """Exit with status 1 if any result's ``key`` is over ``budget_ms``; a budget of 0 checks nothing."""
+    if not budget_ms:
+        return
+    over = {name: stats[key] for name, stats in results.items() if stats[key] > budget_ms}
+    for name, value in over.items():
+        print(f"over budget: {name} {key}={value:.3f} ms > {budget_ms} ms")
+    if over:
+        sys.exit(1)
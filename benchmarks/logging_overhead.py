@@ -0,0 +1,86 @@
+"""
+Event-loop time spent per log call: a synchronous JSON handler against ``logs.setup_logging``.
+
+The sink stands in for stdout under load (a pipe to a busy log collector): each write
+takes ``--write-delay-ms``. Only the time the calling coroutine is blocked is measured,
+which is what other requests on the same loop wait for::
+
+    python -m benchmarks.logging_overhead --calls 5000 --write-delay-ms 0.2
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+
+from benchmarks.common import report
+from logs import JsonFormatter, setup_logging
+from settings import settings
+
+
+class SlowSink(io.TextIOBase):
+    """A text stream whose every write blocks for ``delay`` seconds, then goes to /dev/null."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._devnull = open(os.devnull, "w")
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return self._devnull.write(text)
+
+
+async def _log_calls(logger: logging.Logger, level: int, calls: int) -> list:
+    samples = []
+    for number in range(calls):
+        started = time.perf_counter()
+        logger.log(level, "Fetched university %s", number, extra={"university_id": number})
+        samples.append((time.perf_counter() - started) * 1000)
+        if number % 100 == 0:
+            await asyncio.sleep(0)
+    return samples
+
+
+def run(name: str, level: int, calls: int, queued: bool, sink: SlowSink, debug_rate: float = 1.0) -> dict:
+    root = logging.getLogger()
+    saved_handlers, saved_level, saved_stdout = root.handlers[:], root.level, sys.stdout
+    listener = None
+    try:
+        if queued:
+            settings.LOG_DEBUG_SAMPLE_RATE = debug_rate
+            settings.LOG_LEVEL = "DEBUG"
+            # setup_logging writes to whatever sys.stdout is when it is called.
+            sys.stdout = sink
+            listener = setup_logging()
+            sys.stdout = saved_stdout
+        else:
+            handler = logging.StreamHandler(sink)
+            handler.setFormatter(JsonFormatter())
+            root.handlers[:] = [handler]
+            root.setLevel(logging.DEBUG)
+        started = time.perf_counter()
+        stats = report(name, asyncio.run(_log_calls(logging.getLogger("bench"), level, calls)))
+        if listener is not None:
+            listener.stop()
+            print(f"{'':<40} listener done writing {time.perf_counter() - started:.2f} s after the first call")
+        return stats
+    finally:
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+        sys.stdout = saved_stdout
+
+
+def main(args):
+    sink = SlowSink(args.write_delay_ms / 1000)
+    run("sync JSON handler, INFO", logging.INFO, args.calls, False, sink)
+    run("queue handler, INFO", logging.INFO, args.calls, True, sink)
+    run("queue handler, DEBUG sampled at 1%", logging.DEBUG, args.calls, True, sink, debug_rate=0.01)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--write-delay-ms", type=float, default=0.2)
+    main(parser.parse_args())
@@ -0,0 +1,87 @@
+"""
+Nearest-university lookups: ``GeoIndex.nearest`` against a brute-force scan of every point.
+
+Pure Python, no database. Points are spread uniformly over the earth, queries too; each
+query's results are checked against the scan before anything is timed::
+
+    python -m benchmarks.nearby --points 100000 --queries 200 --budget-ms 5
+
+The scan computes the great-circle distance to every point and keeps the nearest, which
+is what ordering by distance without an index costs per request.
+"""
+import argparse
+import heapq
+import math
+import random
+import time
+
+from benchmarks.common import check_budget, measure, report
+from geoindex import EARTH_RADIUS_KM, GeoIndex
+
+
+def random_point(rng: random.Random) -> tuple:
+    """A latitude/longitude uniformly distributed over the sphere's surface."""
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def brute_force(points, latitude: float, longitude: float, count: int, max_km: float = None) -> list:
+    distances = ((haversine_km(latitude, longitude, lat, lon), item) for lat, lon, item in points)
+    if max_km is not None:
+        distances = (pair for pair in distances if pair[0] <= max_km)
+    return heapq.nsmallest(count, distances, key=lambda pair: pair[0])
+
+
+def check(index: GeoIndex, points, queries, count: int, max_km: float):
+    """Fail loudly if the tree and the scan disagree on any query's distances."""
+    for latitude, longitude in queries:
+        expected = [km for km, _ in brute_force(points, latitude, longitude, count, max_km)]
+        found = [km for km, _ in index.nearest(latitude, longitude, count, max_km)]
+        if len(found) != len(expected) or any(abs(a - b) > 1e-6 for a, b in zip(found, expected)):
+            raise AssertionError(f"results differ at ({latitude}, {longitude}): {found[:3]} != {expected[:3]}")
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    points = [(*random_point(rng), number) for number in range(args.points)]
+    queries = [random_point(rng) for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    index = GeoIndex(points)
+    print(f"built a GeoIndex of {len(index)} points in {time.perf_counter() - started:.2f} s")
+
+    cases = {
+        f"{args.count} nearest": None,
+        f"{args.count} nearest within {args.max_km:g} km": args.max_km,
+    }
+    results = {}
+    for name, max_km in cases.items():
+        check(index, points, queries[:args.checked], args.count, max_km)
+        pending = iter(queries)
+        results[f"GeoIndex, {name}"] = report(
+            f"GeoIndex, {name}", measure(lambda: index.nearest(*next(pending), args.count, max_km), len(queries))
+        )
+        pending = iter(queries)
+        report(
+            f"brute force, {name}",
+            measure(lambda: brute_force(points, *next(pending), args.count, max_km), min(len(queries), args.brute_runs)),
+        )
+    check_budget(results, args.budget_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--max-km", type=float, default=50.0)
+    parser.add_argument("--checked", type=int, default=20, help="queries checked against the brute-force scan")
+    parser.add_argument("--brute-runs", type=int, default=20, help="brute-force queries timed, they are slow")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail if a GeoIndex case's p95 is slower")
+    main(parser.parse_args())
@@ -0,0 +1,63 @@
+"""
+Hot lookups on the pooled engine against the NullPool setup it replaced.
+
+Needs a migrated database reachable through the usual DB_* settings; nothing is written.
+Each case runs the prebuilt ``user_by_id`` statement and a university detail select in a
+fresh session, the way a request does::
+
+    python -m benchmarks.pooling --runs 500 --concurrency 10
+
+Latency is wall time per lookup; CPU is this process's CPU time per lookup, which is what
+statement caching and prepared-statement reuse save.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import pool, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.common import measure_async, report
+from database import DATABASE_URL, ENGINE_OPTIONS
+from univer.models import University
+from user.models import user_by_id
+
+
+async def lookups(sessions, runs: int, concurrency: int) -> tuple:
+    async def one():
+        async with sessions() as db:
+            await db.execute(user_by_id, {"user_id": uuid.uuid4()})
+            await db.execute(select(University).where(University.id == uuid.uuid4()))
+
+    async def worker():
+        return await measure_async(one, runs // concurrency)
+
+    await one()  # The dialect initialises on the first connection; keep that out of the numbers.
+    cpu_started = time.process_time()
+    samples = [sample for batch in await asyncio.gather(*(worker() for _ in range(concurrency))) for sample in batch]
+    cpu_ms = (time.process_time() - cpu_started) * 1000 / len(samples)
+    return samples, cpu_ms
+
+
+async def main(args):
+    setups = {
+        "NullPool": create_async_engine(DATABASE_URL, poolclass=pool.NullPool),
+        "pooled (ENGINE_OPTIONS)": create_async_engine(DATABASE_URL, **ENGINE_OPTIONS),
+    }
+    try:
+        for name, engine in setups.items():
+            sessions = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            samples, cpu_ms = await lookups(sessions, args.runs, args.concurrency)
+            report(name, samples)
+            print(f"{'':<40} cpu={cpu_ms:.3f} ms per lookup pair")
+    finally:
+        for engine in setups.values():
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
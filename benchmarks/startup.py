@@ -0,0 +1,74 @@
+"""
+Cold-start budget: how long ``import main`` takes and how long a new worker takes to answer.
+
+Every run starts a fresh interpreter, so nothing is cached between runs but the OS page
+cache. Uses the same environment as the app (DB_*, SECRET_KEY, ...)::
+
+    python -m benchmarks.startup --runs 5 --import-budget-ms 1500 --first-response-budget-ms 3000
+
+Time to first response is measured from spawning ``uvicorn main:app`` to the first
+successful ``GET /api/openapi.json``, so it includes the lifespan warm-up.
+"""
+import argparse
+import http.client
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.common import check_budget, report
+
+
+def import_time() -> float:
+    """Milliseconds a fresh interpreter spends in ``import main``."""
+    code = "import time; started = time.perf_counter(); import main; print((time.perf_counter() - started) * 1000)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_response_time(timeout: float) -> float:
+    """Milliseconds from spawning a uvicorn worker to its first 200 response."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {server.returncode}:\n{server.stderr.read()}")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                connection.request("GET", "/api/openapi.json")
+                if connection.getresponse().status == 200:
+                    return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"no response within {timeout} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args):
+    imports = report("import main", [import_time() for _ in range(args.runs)])
+    first_responses = report("spawn to first response", [first_response_time(args.timeout) for _ in range(args.runs)])
+    check_budget({"import main": imports}, args.import_budget_ms, key="p50")
+    check_budget({"spawn to first response": first_responses}, args.first_response_budget_ms, key="p50")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--import-budget-ms", type=float, default=0, help="fail if the median import is slower")
+    parser.add_argument("--first-response-budget-ms", type=float, default=0,
+                        help="fail if the median time to first response is slower")
+    main(parser.parse_args())
@@ -0,0 +1,157 @@
+"""
+Student search against a synthetic directory (1M students by default).
+
+Needs a migrated database (``alembic upgrade head``) reachable through the usual DB_*
+settings. Everything is seeded inside one transaction that is rolled back at the end, so
+the database is left as it was::
+
+    python -m benchmarks.student_search --rows 1000000 --runs 50 --budget-ms 100
+
+Each case runs ``student.views.students_search`` itself, so the measured query is the
+endpoint's. ``--explain`` prints each case's plan once, to check the GIN indexes are used.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.common import check_budget, measure_async, report
+from database import engine
+from student.views import students_search
+
+
+FIRST_NAMES = [
+    "Aziz", "Bekzod", "Dilshod", "Farrukh", "Jasur", "Kamola", "Laylo", "Madina", "Nodira", "Otabek",
+    "Rustam", "Sardor", "Shahzod", "Timur", "Ulugbek", "Zarina", "Anvar", "Bobur", "Dildora", "Feruza",
+    "Gulnora", "Hamid", "Ilhom", "Jamshid", "Komil", "Lola", "Malika", "Nigora", "Oybek", "Parviz",
+]
+SYLLABLES = [
+    "ab", "ali", "bek", "dov", "er", "gan", "hon", "ism", "jon", "kar", "lat", "mir", "naz", "ov", "pul",
+    "qod", "ras", "sul", "tosh", "umar", "vali", "xon", "yus", "zod", "ahm", "bar", "dam", "fay", "gul", "hak",
+]
+PLACES = ["Tashkent", "Samarkand", "Bukhara", "Namangan", "Andijan", "Fergana", "Khiva", "Nukus", "Termez", "Navoi"]
+WORDS = ["olympiad", "scholarship", "research", "startup", "award", "volunteer", "patent", "grant", "league", "medal"]
+
+
+async def seed(conn, rows: int) -> dict:
+    """Insert 10 universities x 10 departments x 10 deteriorations and ``rows`` students; return some ids."""
+    user_id = (await conn.execute(text(
+        "INSERT INTO users (id, email, full_name, phone_number, status, password)"
+        " VALUES (gen_random_uuid(), 'bench@example.com', 'Bench', '+0', true, 'x') RETURNING id"
+    ))).scalar_one()
+    params = {"user_id": user_id}
+    await conn.execute(text(
+        "INSERT INTO categories (id, name, created_by_id) VALUES (gen_random_uuid(), 'bench category', :user_id)"
+    ), params)
+    await conn.execute(text(
+        "INSERT INTO regions (id, name, created_by_id) VALUES (gen_random_uuid(), 'bench region', :user_id)"
+    ), params)
+    await conn.execute(text(
+        "INSERT INTO locations (id, name, created_by_id, region_id)"
+        " SELECT gen_random_uuid(), 'bench location', :user_id, id FROM regions WHERE name = 'bench region'"
+    ), params)
+    await conn.execute(text(
+        """
+        INSERT INTO universities (id, name, location_id, category_id, description, amount_of_students,
+                                  phone_number, email, webpage, created_by_id)
+        SELECT gen_random_uuid(), 'bench university ' || n, l.id, c.id, '', 0, 'bench-' || n,
+               'bench' || n || '@example.com', 'https://example.com', :user_id
+        FROM generate_series(1, 10) n, locations l, categories c
+        WHERE l.name = 'bench location' AND c.name = 'bench category'
+        """
+    ), params)
+    await conn.execute(text(
+        """
+        INSERT INTO departments (id, name, description, university_id)
+        SELECT gen_random_uuid(), u.name || ' department ' || n, '', u.id
+        FROM universities u, generate_series(1, 10) n WHERE u.created_by_id = :user_id
+        """
+    ), params)
+    await conn.execute(text(
+        """
+        INSERT INTO deteriorations (id, name, department_id, description, number_of_students)
+        SELECT gen_random_uuid(), d.name || ' deterioration ' || n, d.id, '', 0
+        FROM departments d JOIN universities u ON u.id = d.university_id, generate_series(1, 10) n
+        WHERE u.created_by_id = :user_id
+        """
+    ), params)
+    await conn.execute(text(
+        """
+        WITH pool AS (
+            SELECT array_agg(t.id ORDER BY t.id) AS ids
+            FROM deteriorations t
+            JOIN departments d ON d.id = t.department_id
+            JOIN universities u ON u.id = d.university_id
+            WHERE u.created_by_id = :user_id
+        )
+        INSERT INTO students (id, name, lastname, deterioration_id, working_place, achievements)
+        SELECT gen_random_uuid(),
+               (CAST(:first_names AS text[]))[1 + n % :first_count],
+               initcap((CAST(:syllables AS text[]))[1 + (n * 7) % :syllable_count]
+                       || (CAST(:syllables AS text[]))[1 + (n * 13 / 5) % :syllable_count]),
+               pool.ids[1 + n % array_length(pool.ids, 1)],
+               (CAST(:places AS text[]))[1 + (n * 3) % :place_count] || ' branch ' || n % 97,
+               (CAST(:words AS text[]))[1 + (n * 11) % :word_count] || ' '
+                   || (CAST(:words AS text[]))[1 + (n * 17 / 3) % :word_count] || ' ' || n % 2003
+        FROM generate_series(1, :rows) n, pool
+        """
+    ), {
+        **params,
+        "rows": rows,
+        "first_names": FIRST_NAMES, "first_count": len(FIRST_NAMES),
+        "syllables": SYLLABLES, "syllable_count": len(SYLLABLES),
+        "places": PLACES, "place_count": len(PLACES),
+        "words": WORDS, "word_count": len(WORDS),
+    })
+    await conn.execute(text("ANALYZE students"))
+    university_id = (await conn.execute(text(
+        "SELECT id FROM universities WHERE created_by_id = :user_id ORDER BY name LIMIT 1"
+    ), params)).scalar_one()
+    return {"university_id": university_id}
+
+
+async def main(args):
+    cases = {
+        "first name": {"q": FIRST_NAMES[3]},
+        "last name with a typo": {"q": "Mirnas"},  # Mirnaz
+        "working place word": {"q": PLACES[1]},
+        "two achievement words": {"q": f"{WORDS[2]} {WORDS[5]}"},
+        "first name in one university": {"q": FIRST_NAMES[7]},
+    }
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            started = time.perf_counter()
+            ids = await seed(conn, args.rows)
+            print(f"seeded {args.rows} students in {time.perf_counter() - started:.1f} s")
+            cases["first name in one university"]["university_id"] = ids["university_id"]
+
+            async with AsyncSession(bind=conn) as db:
+                results = {}
+                for name, params in cases.items():
+                    call = dict(university_id=None, department_id=None, deterioration_id=None, limit=20, offset=0,
+                                db=db)
+                    call.update(params)
+                    if args.explain:
+                        plan = await db.execute(text(
+                            "EXPLAIN (ANALYZE, BUFFERS) SELECT id FROM students"
+                            " WHERE search_vector @@ websearch_to_tsquery('simple', :q) OR name % :q OR lastname % :q"
+                        ), {"q": call["q"]})
+                        print(f"-- {name}\n" + "\n".join(row[0] for row in plan))
+                    await students_search(**call)  # Warm the caches once before timing.
+                    results[name] = report(name, await measure_async(lambda: students_search(**call), args.runs))
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+    check_budget(results, args.budget_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=0, help="fail if any case's p95 is slower")
+    parser.add_argument("--explain", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,39 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session
+from jobs.queue import enqueue, job
+from settings import settings
+from univer.cards import refresh_university_cards
+from univer.popularity import refresh_popularity
+from univer.similar import refresh_similarities
+
+
+REFRESH_JOB = "carts.changed"
+
+
+async def schedule_cart_refresh(db: AsyncSession, university_id, user_id):
+    """
+    Queue a refresh of what a cart write on ``university_id`` by ``user_id`` affects (the
+    university's card, its popularity and the similarities) in ``db``'s transaction.
+
+    Writes made while a refresh is waiting are merged into it, so a burst of cart writes
+    costs one job, run ``CART_REFRESH_DELAY_SECONDS`` after the first of them.
+    """
+    payload = {"university_ids": [str(university_id)], "user_ids": [str(user_id)]}
+    await enqueue(db, REFRESH_JOB, payload, delay=settings.CART_REFRESH_DELAY_SECONDS, key="all")
+
+
+@job(REFRESH_JOB)
+async def _refresh_job(payload: dict):
+    university_ids = sorted(set(payload["university_ids"]))
+    user_ids = sorted(set(payload["user_ids"]))
+    # One transaction per rebuild, so each holds its locks only for its own work.
+    async with async_session() as db:
+        await refresh_university_cards(db, university_ids=university_ids)
+        await db.commit()
+    async with async_session() as db:
+        await refresh_popularity(db, university_ids)
+        await db.commit()
+    async with async_session() as db:
+        await refresh_similarities(db, university_ids, user_ids)
+        await db.commit()
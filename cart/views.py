@@ -6,7 +6,8 @@ from uuid import UUID
 from .models import Cart
 from .schemas import CartResponse, AddToCartRequest
 from user.jwt_auth import JWTBearer, JWTAuth
-from database import get_db
+from database import get_db, insert_returning
+from .refresh import schedule_cart_refresh
 
 router = APIRouter()
 
@@ -42,10 +43,9 @@ async def add_cart(
             )
 
 
-        cart_item = Cart(user_id=user_id, university_id=request.university_id)
-        db.add(cart_item)
+        cart_item = await insert_returning(db, Cart, user_id=user_id, university_id=request.university_id)
+        await schedule_cart_refresh(db, request.university_id, user_id)
         await db.commit()
-        await db.refresh(cart_item)
 
         return CartResponse.from_orm(cart_item)
 
@@ -115,6 +115,7 @@ async def remove_from_cart(
 
 
         await db.delete(cart_item)
+        await schedule_cart_refresh(db, university_id, user_id)
         await db.commit()
 
 
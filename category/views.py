@@ -2,11 +2,12 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
-from database import get_db
+from database import get_db, get_read_db, insert_returning, update_owned
+from univer.cards import schedule_card_refresh
+from singleflight import coalesce
 from .models import Category
 from .schemas import CategoryCreate, CategoryID
-from user.models import Users
+from user.models import user_by_id
 from user.jwt_auth import JWTBearer, JWTAuth
 from uuid import UUID
 
@@ -26,7 +27,7 @@ async def create_category(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(JWTBearer(jwt_auth))
 ):
-    logger.info("Creating category with data: %s", category.dict())
+    logger.info("Creating category %s", category.name)
 
     payload = jwt_auth.decode_token(token)
     current_user_id = payload.get("user_id")
@@ -38,7 +39,7 @@ async def create_category(
         )
 
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user:
         logger.error("User not found with ID: %s", current_user_id)
@@ -65,15 +66,14 @@ async def create_category(
         )
 
 
-    new_category = Category(
-        name=category.name,
-        created_by_id=current_user_id
-    )
-
-    db.add(new_category)
     try:
+        new_category = await insert_returning(
+            db,
+            Category,
+            name=category.name,
+            created_by_id=current_user_id
+        )
         await db.commit()
-        await db.refresh(new_category)
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to create category: {str(e)}")
@@ -101,22 +101,6 @@ async def update_category(
         )
 
 
-    result = await db.execute(select(Category).where(Category.id == category_id))
-    existing_category = result.scalar()
-    if not existing_category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Category not found"
-        )
-
-
-    if existing_category.created_by_id != UUID(current_user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to update this category"
-        )
-
-
     name_conflict = await db.execute(
         select(Category).where(Category.name == category.name, Category.id != category_id)
     )
@@ -128,13 +112,19 @@ async def update_category(
 
 
     try:
-        query = (
-            update(Category)
-            .where(Category.id == category_id)
-            .values(name=category.name)
+        await update_owned(
+            db,
+            Category,
+            category_id,
+            Category.created_by_id == UUID(current_user_id),
+            values=dict(name=category.name),
+            not_found="Category not found",
+            forbidden="You do not have permission to update this category",
         )
-        await db.execute(query)
+        await schedule_card_refresh(db, category_id=category_id)
         await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -230,8 +220,9 @@ async def list_categories(
 
 
 @router.get("/all_categories_list/", response_model=list[CategoryID])
+@coalesce
 async def list_categories(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
 
 
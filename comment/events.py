@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+import asyncpg
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session
+from settings import settings
+from .models import CommentEvent
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "comment_events"
+
+
+class Subscription:
+    max_pending = 1000
+
+    def __init__(self):
+        self.queue = asyncio.Queue(self.max_pending)
+        self.dropped = False
+
+
+class CommentEvents:
+    """
+    Pub/sub of comment creates, updates and deletes, one channel per university, shared
+    by every worker through Postgres.
+
+    ``publish`` writes the event to the ``comment_events`` table and sends a ``NOTIFY``
+    in the caller's transaction, so it reaches listeners only if the write commits. Each
+    worker holds one ``LISTEN`` connection and hands the events of the universities it
+    has subscribers for to their queues. Event ids are the table's ids, so a client
+    reconnecting with ``Last-Event-ID`` to any worker is sent what it missed from the
+    table, for ``COMMENT_STREAM_HISTORY_SECONDS``.
+    """
+
+    prune_interval = 60
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._notified = asyncio.Queue()
+        self._task = None
+
+    async def publish(self, db: AsyncSession, university_id, event: str, data: dict):
+        # Events of one university commit in id order, so resuming after an id never skips one.
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"comment_events:{university_id}"))))
+        event_id = await db.scalar(
+            insert(CommentEvent).values(university_id=university_id, event=event, data=json.dumps(data, default=str)).returning(CommentEvent.id)
+        )
+        await db.execute(select(func.pg_notify(CHANNEL, f"{event_id}:{university_id}")))
+
+    def subscribe(self, university_id) -> Subscription:
+        subscription = Subscription()
+        self._subscribers[str(university_id)].add(subscription)
+        return subscription
+
+    def unsubscribe(self, university_id, subscription: Subscription):
+        subscribers = self._subscribers.get(str(university_id))
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[str(university_id)]
+
+    async def last_event_id(self, db: AsyncSession, university_id) -> str:
+        last = await db.scalar(select(func.max(CommentEvent.id)).where(CommentEvent.university_id == university_id))
+        return str(last or 0)
+
+    async def missed_since(self, university_id, last_event_id: str):
+        """Events after ``last_event_id``, or None when they can no longer be replayed."""
+        if not (last_event_id or "").isdigit():
+            return None
+        last = int(last_event_id)
+        async with async_session() as db:
+            oldest = await db.scalar(select(func.min(CommentEvent.id)))
+            if oldest is None or last < oldest - 1:
+                # Events between the client's position and the oldest kept one may be gone.
+                return None
+            result = await db.execute(
+                select(CommentEvent.id, CommentEvent.event, CommentEvent.data)
+                .where(CommentEvent.university_id == university_id, CommentEvent.id > last)
+                .order_by(CommentEvent.id)
+            )
+            return [tuple(row) for row in result]
+
+    def format(self, item) -> str:
+        event_id, event, data = item
+        return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+    def _on_notify(self, connection, pid, channel, payload):
+        event_id, _, university_id = payload.partition(":")
+        if university_id in self._subscribers:
+            self._notified.put_nowait(int(event_id))
+
+    def _deliver(self, rows):
+        for event_id, university_id, event, data in rows:
+            for subscription in list(self._subscribers.get(str(university_id), ())):
+                try:
+                    subscription.queue.put_nowait((event_id, event, data))
+                except asyncio.QueueFull:
+                    # A client this far behind reconnects and resumes from its Last-Event-ID.
+                    subscription.dropped = True
+                    self.unsubscribe(university_id, subscription)
+
+    def _drop_all(self):
+        # Events sent while the listener was down are lost here; clients resume from the table.
+        for university_id, subscribers in list(self._subscribers.items()):
+            for subscription in list(subscribers):
+                subscription.dropped = True
+        self._subscribers.clear()
+
+    async def _listen(self):
+        url = make_url(settings.DATABASE_URL_asycpg).set(drivername="postgresql")
+        connection = await asyncpg.connect(url.render_as_string(hide_password=False))
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        try:
+            await connection.add_listener(CHANNEL, self._on_notify)
+            next_prune = 0.0
+            loop = asyncio.get_running_loop()
+            while not closed.is_set():
+                try:
+                    ids = [await asyncio.wait_for(self._notified.get(), self.prune_interval)]
+                except asyncio.TimeoutError:
+                    ids = []
+                while not self._notified.empty():
+                    ids.append(self._notified.get_nowait())
+                if ids:
+                    rows = await connection.fetch(
+                        "SELECT id, university_id, event, data FROM comment_events WHERE id = ANY($1::bigint[]) ORDER BY id",
+                        ids,
+                    )
+                    self._deliver(rows)
+                if loop.time() >= next_prune:
+                    next_prune = loop.time() + self.prune_interval
+                    await self._prune()
+        finally:
+            await connection.close()
+
+    async def _prune(self):
+        async with async_session() as db:
+            await db.execute(
+                delete(CommentEvent).where(
+                    CommentEvent.created_at < func.now() - text(f"interval '{int(settings.COMMENT_STREAM_HISTORY_SECONDS)} seconds'")
+                )
+            )
+            await db.commit()
+
+    async def _run(self):
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Comment event listener failed, reconnecting: %s", e)
+            self._drop_all()
+            await asyncio.sleep(1)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+comment_events = CommentEvents()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import BigInteger, Column, String, Text, ForeignKey, DateTime, Identity, Index, func
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import relationship
 from uuid import uuid4
@@ -10,8 +10,24 @@ class Comment(Base):
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     body = Column(String, nullable=False)
     user_id = Column(PGUUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
-    university_id = Column(PGUUID(as_uuid=True), ForeignKey('universities.id'), nullable=False)
+    university_id = Column(PGUUID(as_uuid=True), ForeignKey('universities.id'), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user = relationship("Users", backref="comments")
     university = relationship("University", backref="comments")
 
+
+
+class CommentEvent(Base):
+    """Comment changes, kept for ``COMMENT_STREAM_HISTORY_SECONDS`` so streams can resume."""
+    __tablename__ = 'comment_events'
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    university_id = Column(PGUUID(as_uuid=True), nullable=False)
+    event = Column(String(20), nullable=False)
+    data = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_comment_events_university_id_id", university_id, id),
+    )
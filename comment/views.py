@@ -1,12 +1,18 @@
-from fastapi import Depends, HTTPException, status, APIRouter
+import asyncio
+from fastapi import Depends, HTTPException, status, APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from .events import comment_events
 from .models import Comment
 from .schemas import *
 from user.jwt_auth import JWTBearer, JWTAuth
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from uuid import UUID
-from database import get_db
+from database import async_session, get_db, get_read_db, insert_returning, update_owned, delete_owned
+from univer.cards import schedule_card_refresh
+from univer.popularity import schedule_popularity_refresh
+from settings import settings
 import logging
 
 router = APIRouter()
@@ -34,12 +40,14 @@ async def create_comment(
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User ID not found in token")
 
 
-        new_comment = Comment(body=body, university_id=university_id, user_id=user_id)
-        db.add(new_comment)
+        new_comment = await insert_returning(db, Comment, body=body, university_id=university_id, user_id=user_id)
+        await schedule_card_refresh(db, university_ids=[university_id])
+        await schedule_popularity_refresh(db, [university_id])
+        response = CommentResponse.from_orm(new_comment)
+        await comment_events.publish(db, new_comment.university_id, "created", response.model_dump(mode="json"))
         await db.commit()
-        await db.refresh(new_comment)
 
-        return CommentResponse.from_orm(new_comment)
+        return response
 
     except Exception as e:
         raise HTTPException(
@@ -62,20 +70,22 @@ async def update_comment(
 
         user_id = decoded_token.get("user_id")
 
-        comment = await db.execute(select(Comment).filter_by(id=comment_id, user_id=user_id))
-        comment = comment.scalar_one_or_none()
-
-        if not comment:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Comment not found "
-            )
-
-        comment.body = body
+        comment = await update_owned(
+            db,
+            Comment,
+            comment_id,
+            Comment.user_id == user_id,
+            values=dict(body=body),
+            not_found="Comment not found ",
+            forbidden="You do not have permission to update this comment",
+        )
+        response = CommentResponse.from_orm(comment)
+        await comment_events.publish(db, comment.university_id, "updated", response.model_dump(mode="json"))
         await db.commit()
-        await db.refresh(comment)
 
-        return CommentResponse.from_orm(comment)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -97,20 +107,23 @@ async def delete_comment(
 
         user_id = decoded_token.get("user_id")
 
-        comment = await db.execute(select(Comment).filter_by(id=comment_id, user_id=user_id))
-        comment = comment.scalar_one_or_none()
-
-        if not comment:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Comment not found "
-            )
-
-        await db.delete(comment)
+        comment = await delete_owned(
+            db,
+            Comment,
+            comment_id,
+            Comment.user_id == user_id,
+            not_found="Comment not found ",
+            forbidden="You do not have permission to delete this comment",
+        )
+        await schedule_card_refresh(db, university_ids=[comment.university_id])
+        await schedule_popularity_refresh(db, [comment.university_id])
+        await comment_events.publish(db, comment.university_id, "deleted", {"id": str(comment.id)})
         await db.commit()
 
 
         return {"message": "Comment successfully deleted"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -159,7 +172,7 @@ async def my_comments_list(
 @router.get("/comments_list_by_university/{university_id}", response_model=list[CommentResponse])
 async def comments_by_university(
     university_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
         result = await db.execute(select(Comment).filter_by(university_id=university_id))
@@ -177,3 +190,77 @@ async def comments_by_university(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to fetch comments for university: {str(e)}"
         )
+
+
+
+@router.get("/comments_stream/{university_id}")
+async def comments_stream(
+    university_id: UUID,
+    last_event_id: str | None = Header(None),
+):
+    """
+    Server-Sent Events stream of one university's comments.
+
+    A new client first gets the current comments as ``snapshot`` events, a page at a
+    time, followed by ``snapshot_end``; then ``created``, ``updated`` and ``deleted``
+    events as they happen. A client reconnecting with ``Last-Event-ID`` gets only the
+    events it missed, or a fresh snapshot if they are no longer kept. Events come through
+    the database, so the client may reconnect to any worker.
+    """
+    # Subscribe before reading the snapshot, so nothing written meanwhile is lost. Comments
+    # changed while the snapshot is read may show up in it and again as events; clients
+    # apply events by comment id, so that is harmless.
+    subscription = comment_events.subscribe(university_id)
+    try:
+        missed = await comment_events.missed_since(university_id, last_event_id)
+    except Exception:
+        comment_events.unsubscribe(university_id, subscription)
+        raise
+
+    async def stream():
+        # Replayed events may also have reached the queue after subscribing; send each once.
+        sent_id = 0
+        try:
+            if missed is None:
+                # The cursor and the snapshot both come from the primary, the cursor first:
+                # every comment of an event up to it has committed, so the snapshot has it.
+                # Each read gets its own short session, so a slow client holds no connection.
+                async with async_session() as db:
+                    snapshot_id = await comment_events.last_event_id(db, university_id)
+                last_id = None
+                while True:
+                    query = select(Comment).filter_by(university_id=university_id).order_by(Comment.id)
+                    if last_id is not None:
+                        query = query.where(Comment.id > last_id)
+                    async with async_session() as db:
+                        result = await db.execute(query.limit(settings.COMMENT_STREAM_PAGE_SIZE))
+                        page = [CommentResponse.from_orm(comment) for comment in result.scalars().all()]
+                    if not page:
+                        break
+                    last_id = page[-1].id
+                    data = "[" + ",".join(comment.model_dump_json() for comment in page) + "]"
+                    yield f"event: snapshot\ndata: {data}\n\n"
+                yield f"id: {snapshot_id}\nevent: snapshot_end\ndata: {{}}\n\n"
+            else:
+                for item in missed:
+                    sent_id = item[0]
+                    yield comment_events.format(item)
+
+            while not subscription.dropped or not subscription.queue.empty():
+                try:
+                    item = await asyncio.wait_for(
+                        subscription.queue.get(), settings.COMMENT_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item[0] > sent_id:
+                    yield comment_events.format(item)
+        finally:
+            comment_events.unsubscribe(university_id, subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,23 +1,2 @@
-from pydantic_settings import BaseSettings, SettingsConfigDict
-
-
-
-
-class Settings(BaseSettings):
-    DB_HOST: str
-    DB_PORT: int
-    DB_USER: str
-    DB_PASSWORD: str
-    DB_NAME: str
-    @property
-    def DATABASE_URL_asycpg(self):
-       return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-
-    @property
-    def DATABASE_URL_psycopg(self):
-        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-
-    model_config = SettingsConfigDict(env_file='.env', extra="allow")
-
-
-settings = Settings()
+# Settings used to be parsed here as well as in ``settings``; they are now read once, there.
+from settings import Settings, settings  # noqa: F401
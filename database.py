@@ -1,7 +1,19 @@
+import asyncio
+import itertools
+import logging
+import time
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, event, exists, func, insert, select, text, update
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import NullPool
-from config import settings
+from sqlalchemy.orm import DeclarativeBase, Session
+from starlette.requests import HTTPConnection
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -9,10 +21,18 @@ class Base(DeclarativeBase):
 DATABASE_URL = settings.DATABASE_URL_asycpg
 
 
+ENGINE_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    connect_args={"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE},
+)
+
+
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
-    poolclass=NullPool
+    echo=settings.DB_ECHO,
+    **ENGINE_OPTIONS
 )
 
 
@@ -23,6 +43,84 @@ async_session = async_sessionmaker(
 )
 
 
+class ReplicaSet:
+    """
+    Round-robin over the read replicas, skipping the ones that failed their last health check.
+
+    Falls back to the primary engine when no replica is configured or none is healthy.
+    """
+
+    def __init__(self, urls, primary):
+        self.primary = primary
+        self.engines = [create_async_engine(url, **ENGINE_OPTIONS) for url in urls]
+        self.healthy = set(range(len(self.engines)))
+        self._cycle = itertools.cycle(range(len(self.engines)))
+
+    def pick(self):
+        for _ in range(len(self.engines)):
+            index = next(self._cycle)
+            if index in self.healthy:
+                return self.engines[index]
+        return self.primary
+
+    async def check(self):
+        for index, replica in enumerate(self.engines):
+            try:
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            except Exception as e:
+                if index in self.healthy:
+                    logger.warning("Read replica %s is down: %s", replica.url.host, e)
+                self.healthy.discard(index)
+            else:
+                if index not in self.healthy:
+                    logger.info("Read replica %s is back", replica.url.host)
+                self.healthy.add(index)
+
+    async def run_health_checks(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(settings.DB_REPLICA_HEALTH_INTERVAL)
+
+    async def dispose(self):
+        for replica in self.engines:
+            await replica.dispose()
+
+
+replicas = ReplicaSet(settings.DATABASE_URL_replicas, engine)
+
+
+# Callers that committed a write recently, mapped to the time of that commit.
+# Their reads stay on the primary for DB_READ_STICKINESS_SECONDS so they see their own writes.
+_recent_writers = {}
+
+
+def _caller_key(conn: HTTPConnection):
+    return conn.headers.get("authorization")
+
+
+def _is_sticky(key):
+    written_at = _recent_writers.get(key)
+    if written_at is None:
+        return False
+    if time.monotonic() - written_at < settings.DB_READ_STICKINESS_SECONDS:
+        return True
+    _recent_writers.pop(key, None)
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    key = session.info.get("caller")
+    if not key:
+        return
+    now = time.monotonic()
+    if len(_recent_writers) > 10000:
+        for stale in [k for k, t in _recent_writers.items() if now - t >= settings.DB_READ_STICKINESS_SECONDS]:
+            del _recent_writers[stale]
+    _recent_writers[key] = now
+
+
 # async def get_db() -> AsyncSession:
 #     try:
 #         async with async_session() as session:
@@ -32,17 +130,124 @@ async_session = async_sessionmaker(
 
 
 
-async def get_db() -> AsyncSession:
+async def get_db(conn: HTTPConnection) -> AsyncSession:
     try:
         async with async_session() as session:
+            session.info["caller"] = _caller_key(conn)
             yield session
-    except Exception as e:
-        print("Database connection error:", e)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Database session error")
         raise
 
-async def init_db():
-    async with engine.begin() as conn:
 
-        await conn.run_sync(Base.metadata.create_all)
+def is_sticky(conn: HTTPConnection) -> bool:
+    """Whether the caller committed a write recently, so its reads must go to the primary."""
+    return _is_sticky(_caller_key(conn))
+
+
+def read_session(conn: HTTPConnection = None) -> AsyncSession:
+    """Open a session on a read replica, or on the primary if the caller has just written."""
+    if conn is not None and is_sticky(conn):
+        return async_session()
+    return async_session(bind=replicas.pick())
+
+
+async def get_read_db(conn: HTTPConnection) -> AsyncSession:
+    try:
+        async with read_session(conn) as session:
+            yield session
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Database session error")
+        raise
+
+async def insert_returning(db: AsyncSession, model, **values):
+    """
+    INSERT a row and return it as a ``model`` instance hydrated from ``RETURNING``.
+
+    Saves the ``refresh()`` round trip after commit; the caller still commits.
+    """
+    result = await db.execute(insert(model).values(**values).returning(model))
+    return result.scalar_one()
+
+
+async def update_returning(db: AsyncSession, model, *criteria, **values):
+    """
+    UPDATE the row matching ``criteria`` and return it hydrated from ``RETURNING``, or None if nothing matched.
 
+    The caller still commits.
+    """
+    result = await db.execute(update(model).where(*criteria).values(**values).returning(model))
+    return result.scalar_one_or_none()
 
+
+async def _raise_missing_or_forbidden(db: AsyncSession, model, obj_id, not_found, forbidden):
+    found = await db.scalar(select(exists().where(model.id == obj_id)))
+    if not found:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden)
+
+
+async def update_owned(db: AsyncSession, model, obj_id, owner=None, *, values, not_found, forbidden=None):
+    """
+    UPDATE ``model`` row ``obj_id`` in one statement, but only if ``owner`` (e.g.
+    ``University.created_by_id == user_id``) holds, and return the row from ``RETURNING``.
+
+    When nothing was updated a primary-key probe tells 404 from 403, so the ownership
+    check and the write cannot drift apart. The caller still commits.
+    """
+    criteria = [model.id == obj_id]
+    if owner is not None:
+        criteria.append(owner)
+    obj = await update_returning(db, model, *criteria, **values)
+    if obj is None:
+        await _raise_missing_or_forbidden(db, model, obj_id, not_found, forbidden)
+    return obj
+
+
+async def delete_owned(db: AsyncSession, model, obj_id, owner=None, *, not_found, forbidden=None):
+    """DELETE counterpart of :func:`update_owned`; returns the deleted row."""
+    criteria = [model.id == obj_id]
+    if owner is not None:
+        criteria.append(owner)
+    deleted = await db.scalar(delete(model).where(*criteria).returning(model))
+    if deleted is None:
+        await _raise_missing_or_forbidden(db, model, obj_id, not_found, forbidden)
+    return deleted
+
+
+async def lock_for_rebuild(db: AsyncSession, namespace: str, ids=None):
+    """
+    Serialise rebuilds of derived rows with transaction-level advisory locks, released on
+    commit. Call it before reading what the rebuild is computed from: under READ COMMITTED
+    the statements that follow then see everything a rebuild that held the lock earlier
+    saw, so the rebuild that commits last has also read last.
+
+    With ``ids`` only those rows are locked, one key each and in sorted order so that
+    overlapping rebuilds cannot deadlock; without, the whole ``namespace`` is, which also
+    waits for and holds off every rebuild of single rows.
+    """
+    if ids is None:
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(namespace))))
+        return
+    await db.execute(select(func.pg_advisory_xact_lock_shared(func.hashtext(namespace))))
+    keys = sorted({f"{namespace}:{id}" for id in ids})
+    if keys:
+        # One round trip; the ordered subquery makes the locks be taken in key order.
+        await db.execute(
+            text(
+                "SELECT count(pg_advisory_xact_lock(hashtext(key)))"
+                " FROM (SELECT key FROM unnest(CAST(:keys AS text[])) WITH ORDINALITY AS k(key, n) ORDER BY n) ordered"
+            ),
+            {"keys": keys},
+        )
+
+
+async def init_db():
+    async with engine.begin() as conn:
+        # Trigram operator classes used by the student search indexes.
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.create_all)
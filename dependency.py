@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from user.models import Users
+from user.models import user_by_id
 from user.jwt_auth import JWTBearer, JWTAuth
 from database import get_db
+import logging
 import uuid
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 jwt_auth = JWTAuth()
 
 
@@ -14,9 +15,7 @@ async def get_current_staff_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(JWTBearer(jwt_auth)),
 ):
-    print("Decoding token")
     payload = jwt_auth.decode_token(token)
-    print(f"Token payload: {payload}")
 
     user_id = payload.get("user_id")
     if not user_id:
@@ -25,8 +24,8 @@ async def get_current_staff_user(
             detail="Authentication required",
         )
 
-    print(f"Fetching user: {user_id}")
-    result = await db.execute(select(Users).filter(Users.id == uuid.UUID(user_id)))
+    logger.debug("Fetching staff user %s", user_id)
+    result = await db.execute(user_by_id, {"user_id": uuid.UUID(user_id)})
     user = result.scalars().first()
 
     if not user:
@@ -41,6 +40,5 @@ async def get_current_staff_user(
             detail="Only staff users are allowed to perform this action",
         )
 
-    print(f"User fetched: {user}")
     return user
 
@@ -0,0 +1,79 @@
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import bindparam, select
+
+
+@lru_cache(maxsize=512)
+def _select_where(model, names, column):
+    return select(*[getattr(model, name) for name in names]).where(getattr(model, column) == bindparam(column))
+
+
+class Fieldset:
+    """The columns of ``model`` a client asked for, in the order it asked for them."""
+
+    def __init__(self, model, names):
+        self.model = model
+        self.names = tuple(names)
+
+    @property
+    def columns(self):
+        return [getattr(self.model, name) for name in self.names]
+
+    def select(self):
+        """``SELECT`` of only the requested columns; fetch the rows with ``.mappings()``."""
+        return select(*self.columns)
+
+    def select_where(self, column: str):
+        """
+        ``SELECT`` of the requested columns ``WHERE <column> = :<column>``, built once per
+        fieldset; execute it with ``{column: value}``.
+        """
+        return _select_where(self.model, self.names, column)
+
+    def respond(self, rows, status_code: int = status.HTTP_200_OK) -> JSONResponse:
+        """
+        Encode a row mapping, or a list of them, straight into the response.
+
+        Skips ``response_model`` validation, which would reject a response missing fields
+        the client did not ask for.
+        """
+        if isinstance(rows, list):
+            content = [dict(row) for row in rows]
+        else:
+            content = dict(rows)
+        return JSONResponse(jsonable_encoder(content), status_code=status_code)
+
+
+def sparse_fields(model, schema, default=None):
+    """
+    Dependency reading ``?fields=id,name,photo`` for an endpoint serving ``model`` rows.
+
+    Any field of ``schema`` may be requested; without ``fields`` the endpoint returns
+    the fields of ``default`` (all of ``schema`` when not given). Unknown fields get a 400.
+    """
+    allowed = [name for name in schema.model_fields if name in model.__table__.columns]
+    default_names = [name for name in (default or schema).model_fields if name in allowed]
+
+    async def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description=f"Comma-separated fields to return, any of: {', '.join(allowed)}",
+        )
+    ) -> Fieldset:
+        names = list(dict.fromkeys(name.strip() for name in (fields or "").split(",") if name.strip()))
+        if not names:
+            return Fieldset(model, default_names)
+
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}",
+            )
+        return Fieldset(model, names)
+
+    return dependency
@@ -0,0 +1,96 @@
+import heapq
+import math
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def unit_vector(latitude: float, longitude: float) -> tuple:
+    """The point on the unit sphere at ``latitude``/``longitude`` degrees."""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_for_km(km: float) -> float:
+    """Straight-line distance between unit vectors ``km`` apart along the surface."""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def km_for_chord(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class GeoIndex:
+    """
+    Static KD-tree over points on the earth, for nearest-N queries within an optional radius.
+
+    Points are stored as 3-D unit vectors, so the straight-line distance between them
+    grows with the great-circle distance: no special cases at the antimeridian or the
+    poles, and no trigonometry while searching. The tree is implicit, each node being
+    the median of its slice of a flat array, and is rebuilt rather than updated.
+    """
+
+    def __init__(self, points):
+        """``points`` is an iterable of ``(latitude, longitude, item)``."""
+        nodes = [(unit_vector(latitude, longitude), item) for latitude, longitude, item in points]
+        self._vectors = [None] * len(nodes)
+        self._items = [None] * len(nodes)
+        self._build(nodes, 0, len(nodes), 0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _build(self, nodes, start, end, axis):
+        # Every node at depth d splits on axis d % 3 and sits at the middle of its slice.
+        stack = [(nodes, start, end, axis)]
+        while stack:
+            nodes, start, end, axis = stack.pop()
+            if not nodes:
+                continue
+            nodes.sort(key=lambda node: node[0][axis])
+            middle = len(nodes) // 2
+            self._vectors[start + middle], self._items[start + middle] = nodes[middle]
+            next_axis = (axis + 1) % 3
+            stack.append((nodes[:middle], start, start + middle, next_axis))
+            stack.append((nodes[middle + 1:], start + middle + 1, end, next_axis))
+
+    def nearest(self, latitude: float, longitude: float, count: int, max_km: float = None) -> list:
+        """Up to ``count`` ``(distance_km, item)`` pairs, nearest first, optionally within ``max_km``."""
+        if count <= 0:
+            return []
+        tx, ty, tz = target = unit_vector(latitude, longitude)
+        bound = chord_for_km(max_km) ** 2 if max_km is not None else math.inf
+        best = []  # max-heap of the closest points so far, as (-squared distance, index)
+        vectors = self._vectors
+
+        stack = [(0, len(vectors), 0)]
+        while stack:
+            start, end, axis = stack.pop()
+            if start >= end:
+                continue
+            middle = (start + end) // 2
+            vector = vectors[middle]
+            dx, dy, dz = vector[0] - tx, vector[1] - ty, vector[2] - tz
+            squared = dx * dx + dy * dy + dz * dz
+            if squared <= bound:
+                if len(best) < count:
+                    heapq.heappush(best, (-squared, middle))
+                else:
+                    heapq.heapreplace(best, (-squared, middle))
+                if len(best) == count:
+                    bound = -best[0][0]
+
+            offset = target[axis] - vector[axis]
+            next_axis = (axis + 1) % 3
+            # The far side is pushed first so it is popped last, once the near side has had
+            # a chance to tighten the bound, and skipped when the bound cannot reach it.
+            if offset > 0:
+                if offset * offset <= bound:
+                    stack.append((start, middle, next_axis))
+                stack.append((middle + 1, end, next_axis))
+            else:
+                if offset * offset <= bound:
+                    stack.append((middle + 1, end, next_axis))
+                stack.append((start, middle, next_axis))
+
+        return [(km_for_chord(math.sqrt(-squared)), self._items[index]) for squared, index in sorted(best, reverse=True)]
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, Integer, Text, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+import uuid
+from database import Base
+
+
+# Queued and never tried: the jobs a new one with the same dedupe key is merged into.
+PENDING = "status = 'queued' AND attempts = 0"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False, server_default="{}")
+    # queued -> running -> deleted on success, or back to queued for a retry, or failed.
+    status = Column(String(20), nullable=False, server_default="queued")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="5")
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    # Jobs of one name and key that have not run yet are merged into one (see ``enqueue``).
+    dedupe_key = Column(String(200), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Only the rows workers poll for: queued jobs by due time, and running ones whose lock may have expired.
+        Index("ix_jobs_queued_run_at", run_at, postgresql_where=status == "queued"),
+        Index("ix_jobs_running_locked_at", locked_at, postgresql_where=status == "running"),
+        Index("ix_jobs_pending_dedupe_key", name, dedupe_key, unique=True, postgresql_where=text(PENDING)),
+    )
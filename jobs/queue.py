@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from sqlalchemy import event, func, literal, text
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import PENDING, Job
+
+
+# Job name -> async handler taking the job's payload dict.
+handlers = {}
+
+# Called after a session that enqueued jobs commits, to wake idle workers.
+wake_listeners = []
+
+
+def job(name: str):
+    """
+    Register an async function as the handler of job ``name``.
+
+    Handlers run outside the request, may run more than once (after a crash or a retry)
+    and so must be idempotent.
+    """
+    def register(handler):
+        handlers[name] = handler
+        return handler
+    return register
+
+
+async def enqueue(db: AsyncSession, name: str, payload: dict = None, *, delay: float = 0, max_attempts: int = 5,
+                  key: str = None):
+    """
+    Add job ``name`` to the queue in ``db``'s transaction.
+
+    The job becomes visible to workers only when the caller commits, so it is never run
+    for a write that was rolled back.
+
+    With a ``key``, a job of the same name and key that has not started yet absorbs this
+    one instead: list values of the payload are appended to the queued job's, other values
+    replace them, and its due time is kept. Handlers of deduplicated jobs must therefore
+    accept repeated list items.
+    """
+    payload = payload or {}
+    values = dict(name=name, payload=payload, max_attempts=max_attempts, dedupe_key=key)
+    if delay:
+        values["run_at"] = func.now() + timedelta(seconds=delay)
+    stmt = insert(Job).values(**values)
+    if key is not None:
+        merged = Job.payload.op("||", return_type=JSONB)(stmt.excluded.payload)
+        for field, value in payload.items():
+            if isinstance(value, list):
+                appended = func.coalesce(Job.payload[field], literal([], JSONB)).op("||", return_type=JSONB)(
+                    stmt.excluded.payload[field]
+                )
+                merged = merged.op("||", return_type=JSONB)(func.jsonb_build_object(field, appended))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Job.name, Job.dedupe_key], index_where=text(PENDING), set_={"payload": merged}
+        )
+    await db.execute(stmt)
+    db.info["jobs_enqueued"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session):
+    if session.info.pop("jobs_enqueued", False):
+        for wake in wake_listeners:
+            wake()
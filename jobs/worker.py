@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import random
+from datetime import timedelta
+
+from sqlalchemy import and_, delete, func, or_, select, update
+
+from database import async_session
+from settings import settings
+from .models import Job
+from .queue import wake_listeners, handlers
+
+
+logger = logging.getLogger(__name__)
+
+stats = {"succeeded": 0, "retried": 0, "failed": 0}
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: base, 2*base, 4*base... capped, each +-25%."""
+    delay = min(settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOBS_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.75, 1.25)
+
+
+async def queue_snapshot() -> dict:
+    """Jobs per status, and how overdue the oldest due queued job is, for the staff metrics."""
+    queued = Job.status == "queued"
+    due = and_(queued, Job.run_at <= func.now())
+    async with async_session() as db:
+        row = (await db.execute(select(
+            func.count().filter(queued).label("queued"),
+            func.count().filter(due).label("due"),
+            func.count().filter(Job.status == "running").label("running"),
+            func.count().filter(Job.status == "failed").label("failed"),
+            func.min(Job.run_at).filter(queued).label("oldest_run_at"),
+            func.extract("epoch", func.now() - func.min(Job.run_at).filter(due)).label("oldest_due_seconds"),
+        ))).one()
+    snapshot = row._asdict()
+    snapshot["oldest_due_seconds"] = float(snapshot["oldest_due_seconds"] or 0.0)
+    return snapshot
+
+
+class JobWorker:
+    """
+    Pool of asyncio tasks running the jobs of the ``jobs`` table.
+
+    Each task claims one due job at a time with ``FOR UPDATE SKIP LOCKED``, so any number
+    of workers, in this process or others, can share the queue without running a job
+    twice. A job left ``running`` by a worker that died is claimed again once its lock is
+    older than ``JOBS_LOCK_TIMEOUT_SECONDS``.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._tasks = []
+        self._pruner = None
+        self._wake = asyncio.Event()
+        self._stopping = False
+        wake_listeners.append(self.wake)
+
+    def wake(self):
+        self._wake.set()
+
+    async def _claim(self):
+        lock_expired = func.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS)
+        due = (
+            select(Job.id)
+            .where(or_(
+                and_(Job.status == "queued", Job.run_at <= func.now()),
+                and_(Job.status == "running", Job.locked_at < lock_expired),
+            ))
+            .order_by(Job.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        async with async_session() as db:
+            claimed = await db.scalar(
+                update(Job)
+                .where(Job.id.in_(due))
+                .values(status="running", locked_at=func.now(), attempts=Job.attempts + 1)
+                .returning(Job)
+            )
+            await db.commit()
+        return claimed
+
+    async def _finish(self, claimed: Job, error: Exception = None):
+        async with async_session() as db:
+            if error is None:
+                await db.execute(delete(Job).where(Job.id == claimed.id))
+                stats["succeeded"] += 1
+            elif claimed.attempts < claimed.max_attempts:
+                await db.execute(
+                    update(Job).where(Job.id == claimed.id).values(
+                        status="queued",
+                        locked_at=None,
+                        run_at=func.now() + timedelta(seconds=retry_delay(claimed.attempts)),
+                        last_error=repr(error),
+                    )
+                )
+                stats["retried"] += 1
+            else:
+                await db.execute(
+                    update(Job).where(Job.id == claimed.id).values(status="failed", locked_at=None, last_error=repr(error))
+                )
+                stats["failed"] += 1
+            await db.commit()
+
+    async def _run(self, claimed: Job):
+        handler = handlers.get(claimed.name)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job {claimed.name!r}")
+            await handler(claimed.payload)
+        except Exception as e:
+            logger.warning("Job %s (%s) failed on attempt %s: %r", claimed.name, claimed.id, claimed.attempts, e)
+            await self._finish(claimed, e)
+        else:
+            await self._finish(claimed)
+
+    async def _prune(self):
+        # Failed jobs are kept for a while so they can be inspected, dated by their last attempt.
+        while not self._stopping:
+            try:
+                async with async_session() as db:
+                    await db.execute(delete(Job).where(
+                        Job.status == "failed",
+                        Job.run_at < func.now() - timedelta(days=settings.JOBS_FAILED_RETENTION_DAYS),
+                    ))
+                    await db.commit()
+            except Exception:
+                logger.exception("Failed to prune failed jobs")
+            await asyncio.sleep(settings.JOBS_PRUNE_INTERVAL_SECONDS)
+
+    async def _loop(self):
+        while not self._stopping:
+            try:
+                claimed = await self._claim()
+            except Exception:
+                logger.exception("Failed to claim a job")
+                claimed = None
+
+            if claimed is not None:
+                try:
+                    await self._run(claimed)
+                except Exception:
+                    # Recording the outcome failed; the job is retried once its lock expires.
+                    logger.exception("Failed to record the outcome of job %s", claimed.id)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.JOBS_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+        self._pruner = asyncio.create_task(self._prune())
+
+    async def stop(self):
+        """Let running jobs finish for up to ``JOBS_SHUTDOWN_GRACE_SECONDS``, then cancel them."""
+        self._stopping = True
+        self.wake()
+        if self._pruner is not None:
+            self._pruner.cancel()
+            await asyncio.gather(self._pruner, return_exceptions=True)
+            self._pruner = None
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=settings.JOBS_SHUTDOWN_GRACE_SECONDS)
+        for task in pending:
+            # A cancelled job stays ``running`` and is picked up again after its lock expires.
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+
+worker = JobWorker(settings.JOBS_CONCURRENCY)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Integer
+from sqlalchemy import Column, String, ForeignKey, Integer, Float
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -21,6 +21,8 @@ class Location(Base):
     name = Column(String(length=250), nullable=False, unique=True)
     created_by_id = Column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     region_id = Column(PGUUID(as_uuid=True), ForeignKey("regions.id"), nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     created_by = relationship("Users", backref="locations")
     region = relationship("Region", backref="locations")
 
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 from uuid import UUID
 
 
@@ -33,17 +34,33 @@ class RegionResponse(BaseModel):
 class LocationCreate(BaseModel):
     name: str
     region_id: UUID
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class LocationUpdate(BaseModel):
     name: str
     region_id: UUID
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class LocationID(BaseModel):
     id: UUID
     name: str
     region_id: UUID
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class LocationNode(BaseModel):
+    id: UUID
+    name: str
+
+
+class RegionTree(BaseModel):
+    id: UUID
+    name: str
+    locations: list[LocationNode]
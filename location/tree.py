@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import json
+import time
+
+from sqlalchemy import select
+
+from database import async_session
+from settings import settings
+from .models import Region, Location
+
+
+class LocationTree:
+    """
+    The whole ``Region -> Location`` hierarchy, rendered once to JSON and kept in memory.
+
+    The tree is built from one joined query against the primary, so a write followed by
+    ``invalidate()`` is never re-cached from a lagging replica. Concurrent misses share a
+    single build, and a build that raced an invalidation is returned but not kept.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.body = None
+        self.etag = None
+        self._built_at = 0.0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._version += 1
+        self.body = None
+
+    def _fresh(self) -> bool:
+        return self.body is not None and time.monotonic() - self._built_at < self.ttl
+
+    async def _build(self):
+        query = (
+            select(Region.id, Region.name, Location.id, Location.name)
+            .outerjoin(Location, Location.region_id == Region.id)
+            .order_by(Region.name, Location.name)
+        )
+        async with async_session() as db:
+            rows = (await db.execute(query)).all()
+
+        regions = {}
+        for region_id, region_name, location_id, location_name in rows:
+            region = regions.get(region_id)
+            if region is None:
+                region = regions[region_id] = {"id": str(region_id), "name": region_name, "locations": []}
+            if location_id is not None:
+                region["locations"].append({"id": str(location_id), "name": location_name})
+
+        body = json.dumps(list(regions.values()), ensure_ascii=False, separators=(",", ":")).encode()
+        return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+    async def get(self):
+        """``(body, etag)`` of the current tree, building it if needed."""
+        if self._fresh():
+            return self.body, self.etag
+        async with self._lock:
+            if self._fresh():
+                return self.body, self.etag
+            version = self._version
+            body, etag = await self._build()
+            if version == self._version:
+                self.body, self.etag, self._built_at = body, etag, time.monotonic()
+            return body, etag
+
+
+location_tree = LocationTree(settings.LOCATION_TREE_TTL_SECONDS)
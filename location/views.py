@@ -1,12 +1,16 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
-from database import get_db
+from sqlalchemy import delete
+from database import get_db, get_read_db, insert_returning, update_returning, update_owned
+from univer.cards import schedule_card_refresh
+from singleflight import coalesce
+from .tree import location_tree
+from univer.nearby import nearby_index
 from .models import *
 from .schemas import *
-from user.models import Users
+from user.models import user_by_id
 from user.jwt_auth import JWTBearer, JWTAuth
 from uuid import UUID
 
@@ -31,7 +35,7 @@ async def create_region(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(JWTBearer(jwt_auth))
 ):
-    logger.info("Creating region with data: %s", region.dict())
+    logger.info("Creating region %s", region.name)
     payload = jwt_auth.decode_token(token)
     current_user_id = payload.get("user_id")
 
@@ -41,7 +45,7 @@ async def create_region(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user or not user.status:
         raise HTTPException(
@@ -56,15 +60,15 @@ async def create_region(
             detail="A region with this name already exists"
         )
 
-    new_region = Region(
-        name=region.name,
-        created_by_id=current_user_id
-    )
-
-    db.add(new_region)
     try:
+        new_region = await insert_returning(
+            db,
+            Region,
+            name=region.name,
+            created_by_id=current_user_id
+        )
         await db.commit()
-        await db.refresh(new_region)
+        location_tree.invalidate()
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to create region: {str(e)}")
@@ -93,7 +97,7 @@ async def update_region(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user or not user.status:
         raise HTTPException(
@@ -109,11 +113,11 @@ async def update_region(
             detail="Region not found"
         )
 
-    region_to_update.name = region.name
-
     try:
+        region_to_update = await update_returning(db, Region, Region.id == region_id, name=region.name)
+        await schedule_card_refresh(db, region_id=region_id)
         await db.commit()
-        await db.refresh(region_to_update)
+        location_tree.invalidate()
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to update region: {str(e)}")
@@ -141,7 +145,7 @@ async def update_region(
 #             detail="User not authenticated"
 #         )
 #
-#     result = await db.execute(select(Users).where(Users.id == current_user_id))
+#     result = await db.execute(user_by_id, {"user_id": current_user_id})
 #     user = result.scalar()
 #     if not user or not user.status:
 #         raise HTTPException(
@@ -191,8 +195,25 @@ async def get_my_regions(
     return [{"id": str(region.id), "name": region.name, "created_by_id": str(region.created_by_id)} for region in regions]
 
 
+
+
+@router.get(
+    "/locations_tree/",
+    response_model=list[RegionTree],
+    status_code=status.HTTP_200_OK,
+    responses={304: {"description": "The tree has not changed since the ETag sent in If-None-Match"}},
+)
+async def get_locations_tree(request: Request):
+    body, etag = await location_tree.get()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/all_regions_list/", response_model=list[RegionResponse], status_code=status.HTTP_200_OK)
-async def get_all_regions(db: AsyncSession = Depends(get_db)):
+@coalesce
+async def get_all_regions(db: AsyncSession = Depends(get_read_db)):
     regions = await db.execute(select(Region))
     regions = regions.scalars().all()
 
@@ -226,7 +247,7 @@ async def create_location(
             detail="User not authenticated"
         )
 
-    user_result = await db.execute(select(Users).where(Users.id == current_user_id))
+    user_result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = user_result.scalar()
 
     if not user or not user.status:
@@ -253,16 +274,18 @@ async def create_location(
             detail="A location with this name already exists"
         )
 
-    new_location = Location(
-        name=location.name,
-        region_id=location.region_id,
-        created_by_id=current_user_id
-    )
-
-    db.add(new_location)
     try:
+        new_location = await insert_returning(
+            db,
+            Location,
+            name=location.name,
+            region_id=location.region_id,
+            latitude=location.latitude,
+            longitude=location.longitude,
+            created_by_id=current_user_id
+        )
         await db.commit()
-        await db.refresh(new_location)
+        location_tree.invalidate()
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -270,7 +293,13 @@ async def create_location(
             detail=f"Failed to create location: {str(e)}"
         )
 
-    return LocationID(id=new_location.id, name=new_location.name, region_id=new_location.region_id)
+    return LocationID(
+        id=new_location.id,
+        name=new_location.name,
+        region_id=new_location.region_id,
+        latitude=new_location.latitude,
+        longitude=new_location.longitude,
+    )
 
 
 
@@ -291,22 +320,6 @@ async def update_location(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(Location).where(Location.id == location_id))
-    existing_location = result.scalar()
-
-    if not existing_location:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Location not found"
-        )
-
-    if existing_location.created_by_id != UUID(current_user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to update this location"
-        )
-
-    
     region_result = await db.execute(select(Region).where(Region.id == location.region_id))
     region = region_result.scalar()
 
@@ -326,16 +339,29 @@ async def update_location(
         )
 
     try:
-        query = (
-            update(Location)
-            .where(Location.id == location_id)
-            .values(name=location.name, region_id=location.region_id)
+        values = dict(
+            name=location.name,
+            region_id=location.region_id,
         )
-        await db.execute(query)
+        # Coordinates are only changed when sent, so clients that do not know about them keep them.
+        for field in ("latitude", "longitude"):
+            if field in location.model_fields_set:
+                values[field] = getattr(location, field)
+        updated_location = await update_owned(
+            db,
+            Location,
+            location_id,
+            Location.created_by_id == UUID(current_user_id),
+            values=values,
+            not_found="Location not found",
+            forbidden="You do not have permission to update this location",
+        )
+        await schedule_card_refresh(db, location_id=location_id)
         await db.commit()
-
-        updated_location = await db.execute(select(Location).where(Location.id == location_id))
-        updated_location = updated_location.scalar()
+        location_tree.invalidate()
+        nearby_index.invalidate()
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -343,7 +369,13 @@ async def update_location(
             detail=f"Failed to update location: {str(e)}"
         )
 
-    return LocationID(id=updated_location.id, name=updated_location.name, region_id=updated_location.region_id)
+    return LocationID(
+        id=updated_location.id,
+        name=updated_location.name,
+        region_id=updated_location.region_id,
+        latitude=updated_location.latitude,
+        longitude=updated_location.longitude,
+    )
 
 
 # @router.delete("/locations_delete/{location_id}/", status_code=status.HTTP_200_OK)
@@ -413,18 +445,37 @@ async def list_my_locations(
     )
     locations = result.scalars().all()
 
-    return [{"id": location.id, "name": location.name, "region_id": location.region_id} for location in locations]
+    return [
+        {
+            "id": location.id,
+            "name": location.name,
+            "region_id": location.region_id,
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+        }
+        for location in locations
+    ]
 
 
 @router.get("/all_locations_list/", response_model=list[LocationID], status_code=status.HTTP_200_OK)
+@coalesce
 async def list_all_locations(
     region_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     result = await db.execute(select(Location).where(Location.region_id == region_id))
     locations = result.scalars().all()
 
-    return [{"id": location.id, "name": location.name, "region_id": location.region_id} for location in locations]
+    return [
+        {
+            "id": location.id,
+            "name": location.name,
+            "region_id": location.region_id,
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+        }
+        for location in locations
+    ]
 
 
 
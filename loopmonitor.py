@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from profiler import thread_stack
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag: how late a sleep of ``LOOP_LAG_INTERVAL_MS`` wakes up.
+
+    In debug mode a watchdog thread also notices when the loop has not woken up for
+    ``LOOP_BLOCK_THRESHOLD_MS`` past its interval and records the loop thread's stack at
+    that moment, which is the code holding the loop.
+    """
+
+    def __init__(self, interval_ms: int, threshold_ms: int, watchdog: bool):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.watchdog = watchdog
+        self.lag = 0.0
+        self.lag_avg = 0.0
+        self.lag_max = 0.0
+        self.samples = 0
+        self.over_threshold = 0
+        self.blocks = deque(maxlen=50)
+        self._heartbeat = time.monotonic()
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            self.lag = max(0.0, loop.time() - started - self.interval)
+            self.lag_avg = self.lag if not self.samples else 0.9 * self.lag_avg + 0.1 * self.lag
+            self.lag_max = max(self.lag_max, self.lag)
+            self.samples += 1
+            if self.lag > self.threshold:
+                self.over_threshold += 1
+
+    def _watch(self, loop_thread_id: int):
+        reported = None
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or heartbeat == reported:
+                continue
+            # Report each stall once, with the stack of whatever is holding the loop now.
+            reported = heartbeat
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = thread_stack(frame) if frame is not None else []
+            self.blocks.append({
+                "time": datetime.now(timezone.utc).isoformat(),
+                "blocked_at_least_ms": round(blocked_for * 1000, 2),
+                "stack": stack,
+            })
+            logger.warning("Event loop blocked for over %.0f ms in %s", blocked_for * 1000, stack[-1] if stack else "?",
+                           extra={"stack": stack})
+
+    def start(self):
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._measure())
+        if self.watchdog:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._watch, args=(threading.get_ident(),), name="loop-watchdog", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._thread:
+            self._stopped.set()
+            self._thread.join()
+
+    def snapshot(self):
+        return {
+            "lag_ms": round(self.lag * 1000, 2),
+            "lag_avg_ms": round(self.lag_avg * 1000, 2),
+            "lag_max_ms": round(self.lag_max * 1000, 2),
+            "samples": self.samples,
+            "over_threshold": self.over_threshold,
+            "blocks_recorded": len(self.blocks),
+        }
+
+
+monitor = LoopMonitor(settings.LOOP_LAG_INTERVAL_MS, settings.LOOP_BLOCK_THRESHOLD_MS, watchdog=settings.DEBUG)
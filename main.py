@@ -1,20 +1,69 @@
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import UJSONResponse
 from starlette.routing import Mount
 from starlette.staticfiles import StaticFiles
-from database import engine
+from sqlalchemy import text
+from database import engine, replicas
+from admission import AdmissionMiddleware
+from ratelimit import RateLimitMiddleware
+from singleflight import SingleFlightMiddleware
+from slowqueries import QueryRouteMiddleware
+from profiler import ProfileRequestMiddleware
+from loopmonitor import monitor as loop_monitor
+from jobs.worker import worker as job_worker
+from comment.events import comment_events
 from routers import api_router
+from user.jwt_auth import refresh_revoked_tokens
+from user.models import get_pwd_context
+from logs import setup_logging
+
+log_listener = setup_logging()
+logger = logging.getLogger(__name__)
+
+
+async def warm_up(app: FastAPI):
+    """
+    Pay the one-off costs before the first request instead of during it: the database
+    dialect's first-connect initialisation, the bcrypt backend and the OpenAPI schema.
+    """
+    started = time.monotonic()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning("Database warm-up failed: %s", e)
+    get_pwd_context().handler("bcrypt").get_backend()
+    app.openapi()
+    logger.info("Warm-up done in %.0f ms", (time.monotonic() - started) * 1000)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    health_checks = asyncio.create_task(replicas.run_health_checks()) if replicas.engines else None
+    revocations = asyncio.create_task(refresh_revoked_tokens())
+    await warm_up(app)
+    loop_monitor.start()
+    job_worker.start()
+    comment_events.start()
     try:
 
         yield
     finally:
+        await comment_events.stop()
+        await job_worker.stop()
+        loop_monitor.stop()
+        if health_checks:
+            health_checks.cancel()
+        revocations.cancel()
 
+        await replicas.dispose()
         await engine.dispose()
+        log_listener.stop()
 
 app = FastAPI(
     title="Unibase API",
@@ -28,6 +77,12 @@ app = FastAPI(
     ],
 )
 
+app.add_middleware(QueryRouteMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(SingleFlightMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(ProfileRequestMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
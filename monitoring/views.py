@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from dependency import get_current_staff_user
+from settings import settings
+import admission
+from jobs import worker as jobs_worker
+import loopmonitor
+import profiler
+import ratelimit
+import singleflight
+import slowqueries
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", dependencies=[Depends(get_current_staff_user)])
+async def metrics():
+    return {
+        "rate_limit": {
+            "allowed": ratelimit.stats["allowed"],
+            "rejected": dict(ratelimit.stats["rejected"]),
+        },
+        "admission": {name: group.snapshot() for name, group in admission.groups.items()},
+        "single_flight": {**singleflight.stats, "hit_ratio": singleflight.hit_ratio()},
+        "event_loop": loopmonitor.monitor.snapshot(),
+        "jobs": {**jobs_worker.stats, "queue": await jobs_worker.queue_snapshot()},
+    }
+
+
+@router.get("/slow_queries", dependencies=[Depends(get_current_staff_user)])
+async def slow_queries():
+    """The most recent statements over ``SLOW_QUERY_THRESHOLD_MS``, newest first."""
+    return list(reversed(slowqueries.slow_queries))
+
+
+@router.get("/loop_blocks", dependencies=[Depends(get_current_staff_user)])
+async def loop_blocks():
+    """Event-loop stalls caught by the debug-mode watchdog, newest first, with the blocking stack."""
+    return list(reversed(loopmonitor.monitor.blocks))
+
+
+@router.get("/profile", response_class=PlainTextResponse, dependencies=[Depends(get_current_staff_user)])
+async def profile_worker(seconds: float = Query(10, gt=0, le=settings.PROFILER_MAX_SECONDS)):
+    """Sample this worker for ``seconds`` and return collapsed stacks for a flamegraph."""
+    if profiler.worker_profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+    async with profiler.worker_profile_lock:
+        return await profiler.profile_worker(seconds)
+
+
+@router.get("/profile/requests/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(get_current_staff_user)])
+async def request_profile(profile_id: str):
+    """Collapsed stacks of a request sent with ``X-Profile: 1``, by its ``X-Profile-Id``."""
+    collapsed = profiler.request_profiles.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return collapsed
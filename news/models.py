@@ -1,9 +1,22 @@
-from sqlalchemy import Column, String, ForeignKey, Text
+from sqlalchemy import Column, String, ForeignKey, Text, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 from database import Base
 
+
+EXCERPT_LENGTH = 280
+
+
+def make_excerpt(body: str) -> str:
+    """The start of ``body`` with whitespace collapsed, cut at a word boundary to at most ``EXCERPT_LENGTH``."""
+    text = " ".join(body.split())
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    cut = text[:EXCERPT_LENGTH - 1].rsplit(" ", 1)[0]
+    return cut.rstrip(".,;:!?-") + "…"
+
+
 class News(Base):
     __tablename__ = "news"
 
@@ -11,5 +24,14 @@ class News(Base):
     title = Column(String(255), nullable=False)
     photo = Column(String(255), nullable=True)
     body = Column(Text, nullable=False)
+    # Written together with ``body`` so list views never have to read the full text.
+    excerpt = Column(String(EXCERPT_LENGTH), nullable=False, server_default="")
     created_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     created_by = relationship("Users", backref="news")
+
+    __table_args__ = (
+        # Serves the recency-ordered feed and its (created_at, id) keyset pagination.
+        Index("ix_news_created_at_id", created_at.desc(), id.desc()),
+    )
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
-from typing import Optional
+from typing import Optional, List
+from datetime import datetime
 
 class NewsCreate(BaseModel):
     title: str
@@ -24,3 +25,35 @@ class NewsUpdate(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class NewsDetail(NewsResponse):
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NewsListItem(BaseModel):
+    id: UUID
+    title: str
+    photo: Optional[str] = None
+    excerpt: str
+    created_by_id: UUID
+
+    class Config:
+        from_attributes = True
+
+
+class NewsFeedItem(NewsListItem):
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NewsFeedPage(BaseModel):
+    items: List[NewsFeedItem]
+    next_cursor: Optional[str] = None
@@ -1,15 +1,20 @@
 import logging
 import asyncio
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+import base64
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
+from sqlalchemy.orm import load_only
+from sqlalchemy import tuple_
 from uuid import UUID
-from database import get_db
-from typing import List
-from .models import News
-from .schemas import NewsCreate, NewsResponse, NewsUpdate
-from user.models import Users
+from database import get_db, get_read_db, read_session, insert_returning, update_owned, delete_owned
+from singleflight import coalesce
+from fieldsets import Fieldset, sparse_fields
+from typing import List, Optional
+from .models import News, make_excerpt
+from .schemas import NewsCreate, NewsResponse, NewsUpdate, NewsDetail, NewsListItem, NewsFeedItem, NewsFeedPage
+from user.models import user_by_id
 from user.jwt_auth import JWTBearer, JWTAuth
 
 connected_clients = {}
@@ -18,6 +23,13 @@ logger = logging.getLogger(__name__)
 
 jwt_auth = JWTAuth()
 
+# List views load everything but the body, which only the detail endpoint returns.
+list_columns = load_only(
+    News.id, News.title, News.photo, News.excerpt, News.created_by_id, News.created_at, News.updated_at
+)
+news_list_fields = sparse_fields(News, NewsFeedItem, default=NewsListItem)
+news_detail_fields = sparse_fields(News, NewsDetail)
+
 
 @router.post("/news_create/", response_model=NewsResponse, status_code=status.HTTP_201_CREATED)
 async def create_news(
@@ -26,7 +38,7 @@ async def create_news(
     token: str = Depends(JWTBearer(jwt_auth))
 ):
 
-    logger.info("Creating news item with data: %s", news.dict())
+    logger.info("Creating news item %s", news.title)
 
     payload = jwt_auth.decode_token(token)
     current_user_id = payload.get("user_id")
@@ -37,7 +49,7 @@ async def create_news(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user:
         logger.error("User not found with ID: %s", current_user_id)
@@ -53,17 +65,17 @@ async def create_news(
             detail="Only staff users can create news"
         )
 
-    new_news = News(
-        title=news.title,
-        photo=news.photo,
-        body=news.body,
-        created_by_id=current_user_id
-    )
-
-    db.add(new_news)
     try:
+        new_news = await insert_returning(
+            db,
+            News,
+            title=news.title,
+            photo=news.photo,
+            body=news.body,
+            excerpt=make_excerpt(news.body),
+            created_by_id=current_user_id
+        )
         await db.commit()
-        await db.refresh(new_news)
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to create news: {str(e)}")
@@ -97,33 +109,25 @@ async def update_news(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(News).where(News.id == news_id))
-    existing_news = result.scalar()
-
-    if not existing_news:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="News item not found"
-        )
-
-    if existing_news.created_by_id != UUID(current_user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to update this news item"
-        )
-
     try:
-        query = (
-            update(News)
-            .where(News.id == news_id)
-            .values(
-                title=news.title or existing_news.title,
-                photo=news.photo or existing_news.photo,
-                body=news.body or existing_news.body
-            )
+        # Columns left empty in the request are set to themselves, i.e. kept as they are.
+        updated_news = await update_owned(
+            db,
+            News,
+            news_id,
+            News.created_by_id == UUID(current_user_id),
+            values=dict(
+                title=news.title or News.title,
+                photo=news.photo or News.photo,
+                body=news.body or News.body,
+                excerpt=make_excerpt(news.body) if news.body else News.excerpt
+            ),
+            not_found="News item not found",
+            forbidden="You do not have permission to update this news item",
         )
-        await db.execute(query)
         await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -132,11 +136,11 @@ async def update_news(
         )
 
     return NewsResponse(
-        id=news_id,
-        title=news.title or existing_news.title,
-        photo=news.photo or existing_news.photo,
-        body=news.body or existing_news.body,
-        created_by_id=current_user_id
+        id=updated_news.id,
+        title=updated_news.title,
+        photo=updated_news.photo,
+        body=updated_news.body,
+        created_by_id=updated_news.created_by_id
     )
 
 
@@ -156,24 +160,18 @@ async def delete_news(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(News).where(News.id == news_id))
-    existing_news = result.scalar()
-
-    if not existing_news:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="News item not found"
-        )
-
-    if existing_news.created_by_id != UUID(current_user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to delete this news item"
-        )
-
     try:
-        await db.execute(delete(News).where(News.id == news_id))
+        await delete_owned(
+            db,
+            News,
+            news_id,
+            News.created_by_id == UUID(current_user_id),
+            not_found="News item not found",
+            forbidden="You do not have permission to delete this news item",
+        )
         await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -185,45 +183,36 @@ async def delete_news(
 
 
 
-@router.get("/all_news_list/", response_model=List[NewsResponse])
-async def list_all_news(db: AsyncSession = Depends(get_db)):
-    # Fetch all news from the database
-    result = await db.execute(select(News))
-    news_list = result.scalars().all()
+@router.get("/all_news_list/", response_model=List[NewsListItem])
+@coalesce
+async def list_all_news(
+    fieldset: Fieldset = Depends(news_list_fields),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Fetch all news from the database, newest first
+    result = await db.execute(fieldset.select().order_by(News.created_at.desc(), News.id.desc()))
 
     # Return the list of news articles
-    return [
-        NewsResponse(
-            id=article.id,
-            title=article.title,
-            photo=article.photo,
-            body=article.body,
-            created_by_id=article.created_by_id
-        )
-        for article in news_list
-    ]
+    return fieldset.respond(result.mappings().all())
 
 
 
 @router.websocket("/ws/all_news_list/")
-async def websocket_all_news_list(websocket: WebSocket, db: AsyncSession = Depends(get_db)):
+async def websocket_all_news_list(websocket: WebSocket):
     await websocket.accept()
 
     try:
         while True:
-
-            result = await db.execute(select(News))
-            news_list = result.scalars().all()
+            # A session per message: an idle socket must not keep a pooled connection checked out.
+            async with read_session(websocket) as db:
+                result = await db.execute(
+                    select(News).options(list_columns).order_by(News.created_at.desc(), News.id.desc())
+                )
+                news_list = result.scalars().all()
 
 
             news_response_list = [
-                NewsResponse(
-                    id=article.id,
-                    title=article.title,
-                    photo=article.photo,
-                    body=article.body,
-                    created_by_id=article.created_by_id
-                )
+                NewsListItem.model_validate(article).model_dump(mode="json")
                 for article in news_list
             ]
 
@@ -237,9 +226,10 @@ async def websocket_all_news_list(websocket: WebSocket, db: AsyncSession = Depen
 
 
 
-@router.get("/my_news_list/", response_model=List[NewsResponse])
+@router.get("/my_news_list/", response_model=List[NewsListItem])
 async def list_my_news(
-        db: AsyncSession = Depends(get_db),
+        fieldset: Fieldset = Depends(news_list_fields),
+        db: AsyncSession = Depends(get_read_db),
         token: str = Depends(JWTBearer(jwt_auth))
 ):
     payload = jwt_auth.decode_token(token)
@@ -251,20 +241,75 @@ async def list_my_news(
         )
 
 
-    result = await db.execute(select(News).where(News.created_by_id == current_user_id))
-    my_news = result.scalars().all()
+    result = await db.execute(
+        fieldset.select()
+        .where(News.created_by_id == current_user_id)
+        .order_by(News.created_at.desc(), News.id.desc())
+    )
+
+    return fieldset.respond(result.mappings().all())
+
 
-    return [
-        NewsResponse(
-            id=article.id,
-            title=article.title,
-            photo=article.photo,
-            body=article.body,
-            created_by_id=article.created_by_id
+
+@router.get("/news_detail/{news_id}/", response_model=NewsDetail)
+@coalesce
+async def news_detail(
+    news_id: UUID,
+    fieldset: Fieldset = Depends(news_detail_fields),
+    db: AsyncSession = Depends(get_read_db)
+):
+    result = await db.execute(fieldset.select_where("id"), {"id": news_id})
+    article = result.mappings().first()
+    if not article:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="News item not found"
         )
-        for article in my_news
-    ]
 
+    return fieldset.respond(article)
+
+
+
+def encode_feed_cursor(article: News) -> str:
+    return base64.urlsafe_b64encode(f"{article.created_at.isoformat()}|{article.id}".encode()).decode()
 
 
+def decode_feed_cursor(cursor: str):
+    try:
+        created_at, _, news_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        return datetime.fromisoformat(created_at), UUID(news_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
+
+@router.get("/news_feed/", response_model=NewsFeedPage)
+@coalesce
+async def news_feed(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    News ordered by recency, newest first, ``limit`` at a time.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next (older) page. Pass
+    the ``created_at`` of the newest article already held as ``since`` to fetch only
+    articles published after it.
+    """
+    query = select(News).options(list_columns).order_by(News.created_at.desc(), News.id.desc()).limit(limit + 1)
+    if cursor:
+        query = query.where(tuple_(News.created_at, News.id) < decode_feed_cursor(cursor))
+    if since:
+        query = query.where(News.created_at > since)
+
+    result = await db.execute(query)
+    articles = result.scalars().all()
+
+    return NewsFeedPage(
+        items=[NewsFeedItem.model_validate(article) for article in articles[:limit]],
+        next_cursor=encode_feed_cursor(articles[limit - 1]) if len(articles) > limit else None,
+    )
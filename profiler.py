@@ -0,0 +1,163 @@
+import asyncio
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+from database import async_session
+from settings import settings
+from user.jwt_auth import JWTAuth
+from user.models import user_by_id
+
+
+jwt_auth = JWTAuth()
+
+
+# Collapsed stacks of the requests profiled through the X-Profile header, by profile id.
+request_profiles = OrderedDict()
+
+# Only one worker profile runs at a time.
+worker_profile_lock = asyncio.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def thread_stack(frame) -> list:
+    """Labels of ``frame`` and its callers, outermost first."""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def coroutine_stack(coro, thread_id: int) -> list:
+    """
+    Labels along a coroutine's ``await`` chain, outermost first.
+
+    Unlike a thread stack this is there while the task is suspended too, so time spent
+    awaiting the database shows up under the view and dependency that awaited it. While
+    the task is running on ``thread_id`` the chain is completed with that thread's stack.
+    """
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            if not hasattr(coro, "cr_code") and not hasattr(coro, "gi_code"):
+                # A future (a DB round trip, a sleep, ...) rather than a coroutine.
+                stack.append(f"<{type(coro).__name__}>")
+            return stack
+        stack.append(_frame_label(frame))
+        inner = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+        if inner is None and getattr(coro, "cr_running", False):
+            # Running: the awaits below this point only exist as frames on the thread.
+            running = []
+            thread_frame = sys._current_frames().get(thread_id)
+            while thread_frame is not None and thread_frame is not frame:
+                running.append(_frame_label(thread_frame))
+                thread_frame = thread_frame.f_back
+            if thread_frame is frame:
+                stack.extend(reversed(running))
+        coro = inner
+    return stack
+
+
+class Sampler(threading.Thread):
+    """Calls ``sample()`` every ``interval`` seconds and counts the stacks it returns."""
+
+    def __init__(self, sample, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.sample = sample
+        self.interval = interval
+        self.counts = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            for stack in self.sample():
+                if stack:
+                    self.counts[";".join(stack)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        """``frame;frame;frame count`` lines, as read by flamegraph.pl and speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common())
+
+
+def _sample_threads():
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    current = threading.get_ident()
+    for ident, frame in sys._current_frames().items():
+        if ident != current:
+            yield [names.get(ident, str(ident))] + thread_stack(frame)
+
+
+async def profile_worker(seconds: float) -> str:
+    """Sample every thread of this worker for ``seconds`` and return the collapsed stacks."""
+    sampler = Sampler(_sample_threads, settings.PROFILER_INTERVAL_MS / 1000)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(sampler.stop)
+    return sampler.collapsed()
+
+
+async def is_staff_user(scope) -> bool:
+    """Whether the bearer token belongs to a staff user, checked against the database like ``get_current_staff_user``."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            payload = jwt_auth.decode_token(token) if scheme == "Bearer" else None
+            try:
+                user_id = uuid.UUID(payload["user_id"])
+            except (TypeError, KeyError, ValueError):
+                return False
+            async with async_session() as db:
+                result = await db.execute(user_by_id, {"user_id": user_id})
+                user = result.scalars().first()
+            return bool(user and user.status)
+    return False
+
+
+class ProfileRequestMiddleware:
+    """
+    Profile a single request end to end when a staff user sends ``X-Profile: 1``.
+
+    The request task's ``await`` chain is sampled while the request runs; the response
+    carries an ``X-Profile-Id`` under which staff can fetch the collapsed stacks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (b"x-profile", b"1") not in scope["headers"] or not await is_staff_user(scope):
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        thread_id = threading.get_ident()
+        profile_id = uuid.uuid4().hex
+        sampler = Sampler(lambda: [coroutine_stack(task.get_coro(), thread_id)], settings.PROFILER_INTERVAL_MS / 1000)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+            request_profiles[profile_id] = sampler.collapsed()
+            while len(request_profiles) > settings.PROFILER_REQUEST_HISTORY:
+                request_profiles.popitem(last=False)
@@ -0,0 +1,145 @@
+import math
+import time
+from collections import Counter
+
+from starlette.responses import JSONResponse
+from settings import settings
+from user.jwt_auth import JWTAuth
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # only needed when RATE_LIMIT_REDIS_URL is set
+    aioredis = None
+
+
+jwt_auth = JWTAuth()
+
+stats = {"allowed": 0, "rejected": Counter()}
+
+
+def parse_rate(rate: str):
+    requests, _, seconds = rate.partition("/")
+    return int(requests), int(requests) / float(seconds)
+
+
+class MemoryBackend:
+    """
+    Token buckets kept in this worker's memory.
+
+    Each bucket remembers when it will be full again, so buckets of any route can be
+    judged by that alone. When there are more than ``max_buckets`` the full ones are
+    dropped, then the ones closest to full, down to ``shrink_to`` of the limit; the
+    O(n) pass therefore runs at most once per ``max_buckets * (1 - shrink_to)`` new buckets.
+    """
+
+    max_buckets = 100000
+    shrink_to = 0.9
+
+    def __init__(self):
+        # key -> (tokens, updated, full_at)
+        self._buckets = {}
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """Take one token from ``key``'s bucket; return 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        if len(self._buckets) > self.max_buckets:
+            self._shrink(now)
+        return retry_after
+
+    def _shrink(self, now):
+        # Full buckets hold no state worth keeping; past that, losing the nearly full
+        # ones resets the fewest limits.
+        by_full_at = sorted(self._buckets.items(), key=lambda item: item[1][2])
+        keep = int(self.max_buckets * self.shrink_to)
+        drop = max(len(by_full_at) - keep, sum(1 for _, (_, _, full_at) in by_full_at if full_at <= now))
+        for key, _ in by_full_at[:drop]:
+            del self._buckets[key]
+
+
+class RedisBackend:
+    """Token buckets shared by every worker, updated atomically by a Lua script."""
+
+    script = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+        self._redis = aioredis.from_url(url)
+        self._take = self._redis.register_script(self.script)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        return float(await self._take(keys=[f"ratelimit:{key}"], args=[capacity, rate, time.time()]))
+
+
+def client_key(scope) -> str:
+    """The authenticated user when the request carries a valid token, otherwise the client IP."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            payload = jwt_auth.decode_token(token) if scheme == "Bearer" else None
+            if payload and payload.get("user_id"):
+                return f"user:{payload['user_id']}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Throttle the routes listed in ``settings.RATE_LIMITS`` with a token bucket per route and client.
+
+    Rejected requests get ``429`` with ``Retry-After``; counts are kept in ``stats``.
+    """
+
+    def __init__(self, app, limits: dict = None, backend=None):
+        self.app = app
+        self.limits = {path: parse_rate(rate) for path, rate in (limits or settings.RATE_LIMITS).items()}
+        if backend is None:
+            backend = RedisBackend(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_REDIS_URL else MemoryBackend()
+        self.backend = backend
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        retry_after = await self.backend.take(f"{path}:{client_key(scope)}", *limit)
+        if retry_after:
+            stats["rejected"][path] += 1
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        stats["allowed"] += 1
+        await self.app(scope, receive, send)
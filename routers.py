@@ -7,6 +7,7 @@ from news.views import router as news_router
 from comment.views import router as comment_router
 from cart.views import router as cart_router
 from student.views import router as student_router
+from monitoring.views import router as monitoring_router
 
 
 api_router = APIRouter()
@@ -19,5 +20,6 @@ api_router.include_router(univer_router, prefix='', tags=['University'])
 api_router.include_router(student_router, prefix='', tags=['Students'])
 api_router.include_router(comment_router, prefix='', tags=['Comments'])
 api_router.include_router(news_router, prefix='', tags=['News'])
+api_router.include_router(monitoring_router, prefix='', tags=['Monitoring'])
 
 
@@ -1,43 +1,157 @@
 from pydantic_settings import BaseSettings
-import pytz
 from datetime import datetime
-from environs import Env
-
-
-env = Env()
-env.read_env()
 
 
 class Settings(BaseSettings):
     """
-    Settings for the application.
+    Settings for the application, read once from the environment and ``.env``.
     """
-    DEBUG: bool = env.bool("DEBUG")
+    DEBUG: bool
     HOST: str = 'localhost'
     PORT: int = 8000
 
-    DB_HOST: str = env.str("DB_HOST")
-    DB_PORT: int = env.int("DB_PORT")
-    DB_USER: str = env.str("DB_USER")
-    DB_PASSWORD: str = env.str("DB_PASSWORD")
-    DB_NAME: str = env.str("DB_NAME")
+    DB_HOST: str
+    DB_PORT: int
+    DB_USER: str
+    DB_PASSWORD: str
+    DB_NAME: str
+    # Connection pool per engine (primary and each replica). Pooled connections keep their
+    # prepared statements, so hot queries are parsed and planned once per connection.
+    # Set DB_PREPARED_STATEMENT_CACHE_SIZE to 0 behind PgBouncer in transaction mode.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+
+    # Log every SQL statement (through the ``sqlalchemy.engine`` logger); slow, for local debugging only.
+    DB_ECHO: bool = False
 
+    # Statements slower than this are logged and kept for the staff /slow_queries endpoint.
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_BUFFER_SIZE: int = 200
+    # Share of slow SELECTs re-run under EXPLAIN (ANALYZE, BUFFERS); 0 disables it.
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0
 
+    # Comma-separated ``host[:port]`` list of read replicas; empty means reads go to the primary.
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_HEALTH_INTERVAL: int = 15
+    DB_READ_STICKINESS_SECONDS: int = 5
 
     TZ: str = 'Asia/Tashkent'
 
-    SECRET_KEY: str = env.str("SECRET_KEY")
+    LOG_LEVEL: str = "INFO"
+    # Levels for individual loggers, e.g. {"sqlalchemy.engine": "INFO"} to log SQL.
+    LOG_LEVELS: dict[str, str] = {"sqlalchemy.engine": "WARNING", "passlib": "ERROR"}
+    # Share of DEBUG records kept, so debug logging can stay on under production load.
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+
+    SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 60 * 24 * 14
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 60 * 24 * 7
 
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 60
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
+
+    # Token bucket per route and client, as "<requests>/<seconds>".
+    RATE_LIMITS: dict[str, str] = {
+        "/api/user_login": "5/60",
+        "/api/register": "3/60",
+        "/api/create_comments/": "10/60",
+        "/api/add_cart": "30/60",
+    }
+    # Share buckets between workers through Redis; needs the optional ``redis`` package.
+    RATE_LIMIT_REDIS_URL: str = ""
+
+    # Admission control per route group: concurrent requests, wait queue length and latency budget.
+    ADMISSION_GROUPS: dict[str, dict[str, int]] = {
+        "auth": {"concurrency": 8, "queue": 32, "budget_ms": 2000},
+        "reads": {"concurrency": 64, "queue": 256, "budget_ms": 1000},
+        "writes": {"concurrency": 32, "queue": 128, "budget_ms": 2000},
+        # Each websocket message uses a pooled connection, so this stays below DB_POOL_SIZE.
+        "websockets": {"concurrency": 8, "queue": 0, "budget_ms": 0},
+        # Server-Sent Event streams hold no connection between events.
+        "streams": {"concurrency": 500, "queue": 0, "budget_ms": 0},
+    }
+    ADMISSION_AUTH_PATHS: list[str] = ["/api/user_login", "/api/register", "/api/update_password"]
+    ADMISSION_STREAM_PREFIXES: list[str] = ["/api/comments_stream/"]
+
+    COMMENT_STREAM_PAGE_SIZE: int = 100
+    COMMENT_STREAM_HISTORY_SECONDS: int = 3600
+    COMMENT_STREAM_KEEPALIVE_SECONDS: int = 15
+
+    # Background jobs: worker tasks per process, idle poll interval, how long a running job
+    # stays claimed before another worker may take it over, retry backoff, shutdown grace, and
+    # how long failed jobs are kept for inspection and how often they are pruned.
+    JOBS_CONCURRENCY: int = 4
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+    JOBS_LOCK_TIMEOUT_SECONDS: int = 300
+    JOBS_RETRY_BASE_SECONDS: float = 2.0
+    JOBS_RETRY_MAX_SECONDS: float = 600.0
+    JOBS_SHUTDOWN_GRACE_SECONDS: float = 10.0
+    JOBS_FAILED_RETENTION_DAYS: float = 7.0
+    JOBS_PRUNE_INTERVAL_SECONDS: float = 3600.0
+
+    # Event-loop lag is measured every LOOP_LAG_INTERVAL_MS; with DEBUG on, stalls longer
+    # than LOOP_BLOCK_THRESHOLD_MS are recorded with the stack that caused them.
+    LOOP_LAG_INTERVAL_MS: int = 100
+    LOOP_BLOCK_THRESHOLD_MS: int = 100
+
+    # Sampling profiler: time between samples, longest worker profile, profiled requests kept.
+    PROFILER_INTERVAL_MS: int = 5
+    PROFILER_MAX_SECONDS: int = 60
+    PROFILER_REQUEST_HISTORY: int = 50
+
+    # Longest a worker serves its cached region/location tree; writes in this worker drop
+    # it at once, this bounds how long other workers keep serving the old tree.
+    LOCATION_TREE_TTL_SECONDS: int = 60
+
+    # University popularity: what a saved cart and a comment are worth, and the number of
+    # days after which an event counts half as much as a new one.
+    POPULARITY_CART_WEIGHT: float = 3.0
+    POPULARITY_COMMENT_WEIGHT: float = 1.0
+    POPULARITY_HALF_LIFE_DAYS: float = 30.0
+
+    # Similar universities kept per university for "saved this also saved" recommendations.
+    RECOMMENDATIONS_TOP_K: int = 20
+
+    # How long cart writes are gathered into one refresh of the cards, popularity and
+    # similarities they affect.
+    CART_REFRESH_DELAY_SECONDS: float = 2.0
+
+    # Longest a worker serves its in-memory index of university coordinates; like the
+    # location tree, writes in this worker rebuild it at once.
+    NEARBY_INDEX_TTL_SECONDS: int = 60
+
+    @property
+    def DATABASE_URL_asycpg(self):
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
+    @property
+    def DATABASE_URL_psycopg(self):
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
+    @property
+    def DATABASE_URL_replicas(self):
+        urls = []
+        for host in filter(None, (h.strip() for h in self.DB_REPLICA_HOSTS.split(","))):
+            host, _, port = host.partition(":")
+            urls.append(
+                f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{host}:{port or self.DB_PORT}/{self.DB_NAME}"
+            )
+        return urls
+
     def get_tz(self):
+        import pytz
+
         tz = pytz.timezone(self.TZ)
         return datetime.now(tz)
 
     class Config:
         env_file = '.env'
         env_file_encoding = 'utf-8'
+        extra = 'allow'
 
 
 settings = Settings()
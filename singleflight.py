@@ -0,0 +1,84 @@
+import asyncio
+
+from starlette.requests import HTTPConnection
+
+from database import is_sticky
+
+
+stats = {"requests": 0, "shared": 0}
+
+
+def coalesce(view):
+    """
+    Mark a public GET view for single-flight: concurrent requests with the same path and
+    query string wait for one execution and are sent its already encoded response.
+
+    Only for views whose response does not depend on who is asking. Callers that have
+    just written are never coalesced, as they must read their own writes from the primary.
+    """
+    view.coalesce = True
+    return view
+
+
+def _copy(message: dict) -> dict:
+    # Outer middleware (CORS) edits the headers of the messages it is sent in place, so
+    # every send gets its own dict and headers list.
+    message = dict(message)
+    if "headers" in message:
+        message["headers"] = list(message["headers"])
+    return message
+
+
+def hit_ratio():
+    return stats["shared"] / stats["requests"] if stats["requests"] else 0.0
+
+
+class SingleFlightMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._path_regexes = None
+        self._inflight = {}
+
+    def _coalesced(self, scope) -> bool:
+        if self._path_regexes is None:
+            self._path_regexes = [
+                route.path_regex for route in scope["app"].routes
+                if getattr(getattr(route, "endpoint", None), "coalesce", False)
+            ]
+        return any(regex.match(scope["path"]) for regex in self._path_regexes)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "GET" or not self._coalesced(scope)
+                or is_sticky(HTTPConnection(scope))):
+            await self.app(scope, receive, send)
+            return
+
+        stats["requests"] += 1
+        key = (scope["path"], scope["query_string"])
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # Shielded so a waiter that disconnects does not cancel the shared execution.
+            messages = await asyncio.shield(inflight)
+            if messages is not None:
+                stats["shared"] += 1
+                for message in messages:
+                    await send(_copy(message))
+                return
+            # The shared execution failed; run this request on its own.
+            await self.app(scope, receive, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        messages = []
+
+        async def send_and_keep(message):
+            messages.append(_copy(message))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_keep)
+        finally:
+            del self._inflight[key]
+            complete = bool(messages) and not messages[-1].get("more_body", False)
+            future.set_result(messages if complete else None)
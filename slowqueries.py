@@ -0,0 +1,112 @@
+import logging
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# "<METHOD> <path>" of the request being served, attached to the queries it runs.
+current_route: ContextVar[str] = ContextVar("current_route", default=None)
+
+# The most recent slow queries, newest last.
+slow_queries = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+
+
+def redact(parameters):
+    """Replace parameter values by their type (and length for strings), keeping the structure."""
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: one parameter set is enough to see the shape.
+            return {"rows": len(parameters), "first": redact(parameters[0])}
+        return [redact(value) for value in parameters]
+    if parameters is None:
+        return None
+    if isinstance(parameters, (str, bytes)):
+        return f"<{type(parameters).__name__}:{len(parameters)}>"
+    return f"<{type(parameters).__name__}>"
+
+
+def explain(conn, statement, parameters):
+    """
+    ``EXPLAIN (ANALYZE, BUFFERS)`` of a SELECT on the connection that just ran it.
+
+    ANALYZE executes the query again, so this is only ever called for SELECTs and on a
+    sample. It runs in a savepoint so a failure cannot abort the caller's transaction.
+    """
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"EXPLAIN failed: {e}"
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_timer(context):
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_slow_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+    if elapsed_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+
+    entry = {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(elapsed_ms, 2),
+        "route": current_route.get(),
+        "statement": statement,
+        "parameters": redact(parameters),
+        "explain": None,
+    }
+    is_select = statement.lstrip()[:6].upper() == "SELECT"
+    if is_select and not executemany and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+        entry["explain"] = explain(conn, statement, parameters)
+
+    slow_queries.append(entry)
+    logger.warning(
+        "Slow query (%.0f ms) on %s", elapsed_ms, entry["route"],
+        extra={"statement": statement, "parameters": entry["parameters"]},
+    )
+
+
+class QueryRouteMiddleware:
+    """Make the request's method and path available to the query hooks via ``current_route``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        token = current_route.set(f"{scope.get('method', 'WS')} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, ForeignKey, Computed, Index
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from database import Base
 
@@ -11,8 +11,28 @@ class Student(Base):
     name = Column(String(length=100), nullable=False)
     lastname = Column(String(length=100), nullable=False)
     photo = Column(String, nullable=True)
-    deterioration_id = Column(UUID(as_uuid=True), ForeignKey("deteriorations.id"), nullable=False)
+    deterioration_id = Column(UUID(as_uuid=True), ForeignKey("deteriorations.id"), nullable=False, index=True)
     description = Column(String, nullable=True)
     working_place = Column(String(length=250), nullable=True)
     achievements = Column(String, nullable=True)
+    # Kept up to date by Postgres and only read by search; names weigh more than working place and achievements.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(lastname, '')), 'A')"
+            " || setweight(to_tsvector('simple', coalesce(working_place, '')), 'B')"
+            " || setweight(to_tsvector('simple', coalesce(achievements, '')), 'C')",
+            persisted=True,
+        ),
+    ))
     deterioration = relationship("Deterioration", backref="students")
+
+    __table_args__ = (
+        Index("ix_students_search_vector", "search_vector", postgresql_using="gin"),
+        # Typo-tolerant matching on names (needs the pg_trgm extension, created by migration 0006).
+        Index(
+            "ix_students_name_trgm", "name", "lastname",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops", "lastname": "gin_trgm_ops"},
+        ),
+    )
@@ -22,3 +22,24 @@ class StudentResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class StudentListItem(BaseModel):
+    id: UUID
+    name: str
+    photo: str | None
+
+
+class StudentSearchResult(BaseModel):
+    id: UUID
+    name: str
+    lastname: str
+    photo: str | None
+    deterioration_id: UUID
+    working_place: str | None
+    rank: float
+
+
+class StudentSearchPage(BaseModel):
+    items: list[StudentSearchResult]
+    next_offset: int | None = None
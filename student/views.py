@@ -1,12 +1,15 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
-from database import get_db
+from sqlalchemy import delete, func, or_
+from database import get_db, get_read_db, insert_returning, update_returning
+from singleflight import coalesce
+from fieldsets import Fieldset, sparse_fields
 from .models import Student
-from .schemas import StudentCreate, StudentResponse
-from user.models import Users
+from .schemas import StudentCreate, StudentResponse, StudentListItem, StudentSearchPage
+from univer.models import Department, Deterioration
+from user.models import user_by_id
 from user.jwt_auth import JWTBearer, JWTAuth
 from uuid import UUID
 
@@ -14,13 +17,16 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 jwt_auth = JWTAuth()
 
+student_fields = sparse_fields(Student, StudentResponse)
+student_list_fields = sparse_fields(Student, StudentResponse, default=StudentListItem)
+
 @router.post("/students_create/", response_model=StudentResponse, status_code=status.HTTP_201_CREATED)
 async def create_student(
     student: StudentCreate,
     db: AsyncSession = Depends(get_db),
     token: str = Depends(JWTBearer(jwt_auth))
 ):
-    logger.info("Creating student with data: %s", student.dict())
+    logger.info("Creating student in deterioration %s", student.deterioration_id)
 
     payload = jwt_auth.decode_token(token)
     current_user_id = payload.get("user_id")
@@ -32,7 +38,7 @@ async def create_student(
         )
 
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user or not user.status:
         logger.error("User is not authorized (ID: %s)", current_user_id)
@@ -41,11 +47,9 @@ async def create_student(
             detail="Only staff users can perform this action"
         )
 
-    new_student = Student(**student.dict())
-    db.add(new_student)
     try:
+        new_student = await insert_returning(db, Student, **student.dict())
         await db.commit()
-        await db.refresh(new_student)
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to create student: {str(e)}")
@@ -76,7 +80,7 @@ async def update_student(
         )
 
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user or not user.status:
         logger.error("User is not authorized (ID: %s)", current_user_id)
@@ -96,17 +100,8 @@ async def update_student(
         )
 
     try:
-        query = (
-            update(Student)
-            .where(Student.id == student_id)
-            .values(**student.dict())
-        )
-        await db.execute(query)
+        updated_student = await update_returning(db, Student, Student.id == student_id, **student.dict())
         await db.commit()
-
-        # Fetch the updated student
-        result = await db.execute(select(Student).where(Student.id == student_id))
-        updated_student = result.scalar()
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to update student: {str(e)}")
@@ -136,7 +131,7 @@ async def delete_student(
         )
 
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user or not user.status:
         logger.error("User is not authorized (ID: %s)", current_user_id)
@@ -171,15 +166,16 @@ async def delete_student(
 @router.get("/students_detail/{student_id}/", response_model=StudentResponse, status_code=status.HTTP_200_OK)
 async def student_detail(
     student_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    fieldset: Fieldset = Depends(student_fields),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    logger.info(f"Fetching details for student with ID: {student_id}")
+    logger.debug("Fetching details for student with ID: %s", student_id)
 
     # Query the student by their ID
     result = await db.execute(
-        select(Student).where(Student.id == student_id)
+        fieldset.select_where("id"), {"id": student_id}
     )
-    student = result.scalar()
+    student = result.mappings().first()
 
     if not student:
         logger.warning(f"No student found with ID: {student_id}")
@@ -189,30 +185,22 @@ async def student_detail(
         )
 
     # Return the student's details
-    return {
-        "id": student.id,
-        "name": student.name,
-        "lastname": student.lastname,
-        "photo": student.photo,
-        "deterioration_id": student.deterioration_id,
-        "description": student.description,
-        "working_place": student.working_place,
-        "achievements": student.achievements,
-    }
+    return fieldset.respond(student)
 
 
-@router.get("/students_list/{deterioration_id}/", response_model=list[dict], status_code=status.HTTP_200_OK)
+@router.get("/students_list/{deterioration_id}/", response_model=list[StudentListItem], status_code=status.HTTP_200_OK)
 async def students_list(
     deterioration_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    fieldset: Fieldset = Depends(student_list_fields),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    logger.info(f"Fetching students list with deterioration_id: {deterioration_id}")
+    logger.debug("Fetching students list with deterioration_id: %s", deterioration_id)
 
     # Query students filtered by deterioration_id
     result = await db.execute(
-        select(Student).where(Student.deterioration_id == deterioration_id)
+        fieldset.select_where("deterioration_id"), {"deterioration_id": deterioration_id}
     )
-    students = result.scalars().all()
+    students = result.mappings().all()
 
     if not students:
         logger.warning(f"No students found for deterioration_id: {deterioration_id}")
@@ -221,12 +209,66 @@ async def students_list(
             detail="No students found for the provided deterioration ID"
         )
 
-    # Return name and photo of students
-    return [
-        {
-            "name": student.name,
-            "photo": student.photo,
-            "id": student.id,
-        }
-        for student in students
-    ]
+    # Return name and photo of students, unless other fields were asked for
+    return fieldset.respond(students)
+
+
+@router.get("/students_search/", response_model=StudentSearchPage, status_code=status.HTTP_200_OK)
+@coalesce
+async def students_search(
+    q: str = Query(..., min_length=2, max_length=100),
+    university_id: UUID | None = None,
+    department_id: UUID | None = None,
+    deterioration_id: UUID | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Search students by name, last name, working place and achievements, best matches first.
+
+    Words are matched with the full-text index; names also match approximately through
+    the trigram index, so small typos still find the student.
+    """
+    query_vector = func.websearch_to_tsquery("simple", q)
+    rank = (
+        func.ts_rank_cd(Student.search_vector, query_vector)
+        + func.greatest(func.similarity(Student.name, q), func.similarity(Student.lastname, q))
+    ).label("rank")
+
+    query = select(
+        Student.id,
+        Student.name,
+        Student.lastname,
+        Student.photo,
+        Student.deterioration_id,
+        Student.working_place,
+        rank,
+    ).where(
+        or_(
+            Student.search_vector.op("@@")(query_vector),
+            Student.name.op("%")(q),
+            Student.lastname.op("%")(q),
+        )
+    )
+
+    if deterioration_id:
+        query = query.where(Student.deterioration_id == deterioration_id)
+    if department_id or university_id:
+        query = query.join(Deterioration, Deterioration.id == Student.deterioration_id)
+        if department_id:
+            query = query.where(Deterioration.department_id == department_id)
+        if university_id:
+            query = query.join(Department, Department.id == Deterioration.department_id).where(
+                Department.university_id == university_id
+            )
+
+    result = await db.execute(
+        query.order_by(rank.desc(), Student.id).offset(offset).limit(limit + 1)
+    )
+    rows = result.mappings().all()
+
+    return {
+        "items": rows[:limit],
+        "next_offset": offset + limit if len(rows) > limit else None,
+    }
@@ -0,0 +1,95 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session, lock_for_rebuild
+from jobs.queue import enqueue, job
+from cart.models import Cart
+from category.models import Category
+from comment.models import Comment
+from location.models import Location, Region
+from .models import University, UniversityCard
+
+
+REFRESH_JOB = "university_cards.refresh"
+LOCK_KEY = "university_cards"
+
+
+def _card_rows(*criteria):
+    comment_count = select(func.count()).where(Comment.university_id == University.id).scalar_subquery()
+    cart_count = select(func.count()).where(Cart.university_id == University.id).scalar_subquery()
+    card = func.jsonb_build_object(
+        "id", University.id,
+        "name", University.name,
+        "photo", University.photo,
+        "location", func.jsonb_build_object("id", Location.id, "name", Location.name),
+        "region", func.jsonb_build_object("id", Region.id, "name", Region.name),
+        "category", func.jsonb_build_object("id", Category.id, "name", Category.name),
+        "comment_count", comment_count,
+        "cart_count", cart_count,
+    )
+    return (
+        select(University.id, University.name, University.category_id, University.location_id, card)
+        .join(Location, Location.id == University.location_id)
+        .join(Region, Region.id == Location.region_id)
+        .join(Category, Category.id == University.category_id)
+        .where(*criteria)
+    )
+
+
+async def refresh_university_cards(db: AsyncSession, *, university_ids=None, location_id=None, region_id=None,
+                                   category_id=None):
+    """
+    Rebuild the cards of the universities matching the given filters (all of them when
+    none is given) in one ``INSERT ... SELECT ... ON CONFLICT DO UPDATE``. The caller commits.
+
+    Refreshes of the same card are serialised (see ``database.lock_for_rebuild``), so a
+    slower refresh never writes back an older snapshot. Refreshes of given universities
+    lock each of them; refreshes by location, region, category or of everything lock all.
+    """
+    targeted = university_ids is not None and location_id is None and region_id is None and category_id is None
+    await lock_for_rebuild(db, LOCK_KEY, university_ids if targeted else None)
+
+    criteria = []
+    if university_ids is not None:
+        criteria.append(University.id.in_(university_ids))
+    if location_id is not None:
+        criteria.append(University.location_id == location_id)
+    if region_id is not None:
+        criteria.append(Location.region_id == region_id)
+    if category_id is not None:
+        criteria.append(University.category_id == category_id)
+
+    stmt = insert(UniversityCard).from_select(
+        ["university_id", "name", "category_id", "location_id", "card"], _card_rows(*criteria)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UniversityCard.university_id],
+        set_={
+            "name": stmt.excluded.name,
+            "category_id": stmt.excluded.category_id,
+            "location_id": stmt.excluded.location_id,
+            "card": stmt.excluded.card,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def schedule_card_refresh(db: AsyncSession, **filters):
+    """
+    Queue a card refresh in ``db``'s transaction, e.g. ``university_ids=[id]`` or
+    ``category_id=id``; with no filters every card is rebuilt.
+    """
+    payload = {}
+    for key, value in filters.items():
+        if value is not None:
+            payload[key] = [str(v) for v in value] if isinstance(value, (list, tuple, set)) else str(value)
+    await enqueue(db, REFRESH_JOB, payload)
+
+
+@job(REFRESH_JOB)
+async def _refresh_job(payload: dict):
+    async with async_session() as db:
+        await refresh_university_cards(db, **payload)
+        await db.commit()
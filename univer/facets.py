@@ -0,0 +1,108 @@
+from sqlalchemy import and_, case, func, literal, select, true, tuple_
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from category.models import Category
+from location.models import Location, Region
+from .models import University
+
+
+# GROUPING(category_id, location_id, region_id) of each grouping set: a bit is set for
+# every column the set does not group by.
+FACET_SETS = {3: "category", 5: "location", 6: "region"}
+TOTAL_SET = 7
+
+
+async def faceted_search(db: AsyncSession, *, category_ids=(), location_ids=(), region_ids=(),
+                         min_students=None, max_students=None, order_by=(University.name, University.id),
+                         limit=20, offset=0):
+    """
+    A page of universities matching every filter in ``order_by`` order, plus per-facet
+    counts, in one statement.
+
+    Filters within a facet are OR-ed and facets are AND-ed. Each facet is counted under
+    all the *other* filters, so choosing a category still shows how many universities
+    every other category would give. The page and the counts come back as two JSONB
+    values of the same ``SELECT``, so the database is asked once.
+    """
+    category_ok = University.category_id.in_(category_ids) if category_ids else true()
+    location_ok = University.location_id.in_(location_ids) if location_ids else true()
+    region_ok = Location.region_id.in_(region_ids) if region_ids else true()
+    students_ok = []
+    if min_students is not None:
+        students_ok.append(University.amount_of_students >= min_students)
+    if max_students is not None:
+        students_ok.append(University.amount_of_students <= max_students)
+
+    grouping = func.grouping(University.category_id, University.location_id, Location.region_id)
+    count = case(
+        (grouping == 3, func.count().filter(and_(location_ok, region_ok))),
+        (grouping == 5, func.count().filter(and_(category_ok, region_ok))),
+        (grouping == 6, func.count().filter(and_(category_ok, location_ok))),
+        else_=func.count().filter(and_(category_ok, location_ok, region_ok)),
+    )
+    facets = (
+        select(
+            grouping.label("grouping"),
+            func.coalesce(University.category_id, University.location_id, Location.region_id).label("id"),
+            func.coalesce(Category.name, Location.name, Region.name).label("name"),
+            count.label("count"),
+        )
+        .join(Location, Location.id == University.location_id)
+        .join(Region, Region.id == Location.region_id)
+        .join(Category, Category.id == University.category_id)
+        .where(*students_ok)
+        .group_by(func.grouping_sets(
+            tuple_(University.category_id, Category.name),
+            tuple_(University.location_id, Location.name),
+            tuple_(Location.region_id, Region.name),
+            tuple_(),
+        ))
+        .subquery()
+    )
+
+    page = (
+        select(
+            University.id,
+            University.name,
+            University.photo,
+            func.row_number().over(order_by=order_by).label("position"),
+        )
+        .join(Location, Location.id == University.location_id)
+        .where(category_ok, location_ok, region_ok, *students_ok)
+        .order_by(*order_by)
+        .offset(offset)
+        .limit(limit)
+        .subquery()
+    )
+
+    empty = literal("[]", JSONB)
+    page_json = select(func.coalesce(
+        func.jsonb_agg(aggregate_order_by(
+            func.jsonb_build_object("id", page.c.id, "name", page.c.name, "photo", page.c.photo), page.c.position
+        )),
+        empty,
+    )).scalar_subquery()
+    facets_json = select(func.coalesce(
+        func.jsonb_agg(func.jsonb_build_object(
+            "grouping", facets.c.grouping, "id", facets.c.id, "name", facets.c.name, "count", facets.c.count,
+        )),
+        empty,
+    )).scalar_subquery()
+
+    items, facet_rows = (await db.execute(select(page_json.label("items"), facets_json.label("facets")))).one()
+
+    selected = {"category": set(map(str, category_ids)), "location": set(map(str, location_ids)),
+                "region": set(map(str, region_ids))}
+    result = {"items": items, "total": 0, "facets": {name: [] for name in FACET_SETS.values()}}
+    for row in facet_rows:
+        if row["grouping"] == TOTAL_SET:
+            result["total"] = row["count"]
+            continue
+        facet = FACET_SETS[row["grouping"]]
+        # Values that would give no results are left out unless they are currently selected.
+        if row["count"] or row["id"] in selected[facet]:
+            result["facets"][facet].append({"id": row["id"], "name": row["name"], "count": row["count"]})
+    for values in result["facets"].values():
+        values.sort(key=lambda value: (-value["count"], value["name"]))
+    return result
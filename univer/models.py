@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, ForeignKey, Integer, Text
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy import Column, String, ForeignKey, Integer, Float, Text, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
 from database import Base
@@ -11,8 +11,8 @@ class University(Base):
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     name = Column(String(length=255), nullable=False,unique=True)
     photo = Column(String(length=255), nullable=True)
-    location_id = Column(PGUUID(as_uuid=True), ForeignKey("locations.id"), nullable=False)
-    category_id = Column(PGUUID(as_uuid=True), ForeignKey("categories.id"), nullable=False)
+    location_id = Column(PGUUID(as_uuid=True), ForeignKey("locations.id"), nullable=False, index=True)
+    category_id = Column(PGUUID(as_uuid=True), ForeignKey("categories.id"), nullable=False, index=True)
     description = Column(Text, nullable=False)
     video = Column(String(length=255), nullable=True)
     amount_of_students = Column(Integer, nullable=False)
@@ -20,10 +20,19 @@ class University(Base):
     email = Column(String(length=255), nullable=False, unique=True)
     webpage = Column(String(length=255), nullable=False)
     created_by_id = Column(PGUUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # Where the campus is, when it is more precise than its location's coordinates.
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    # Decayed score of carts and comments, kept up to date by ``univer.popularity``.
+    popularity = Column(Float, nullable=False, server_default="0")
     location = relationship("Location", backref="universities")
     category = relationship("Category", backref="universities")
     created_by = relationship("Users", backref="universities")
 
+    __table_args__ = (
+        Index("ix_universities_popularity", popularity.desc(), id),
+    )
+
 
 class Department(Base):
     __tablename__ = "departments"
@@ -32,7 +41,7 @@ class Department(Base):
     name = Column(String(length=255), nullable=False, unique=True)
     photo = Column(String(length=255), nullable=True)
     description = Column(Text, nullable=False)
-    university_id = Column(PGUUID(as_uuid=True), ForeignKey("universities.id"), nullable=False)
+    university_id = Column(PGUUID(as_uuid=True), ForeignKey("universities.id"), nullable=False, index=True)
     university = relationship("University", backref="departments")
 
 
@@ -43,9 +52,52 @@ class Deterioration(Base):
 
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     name = Column(String(length=255), nullable=False, unique=True)
-    department_id = Column(PGUUID(as_uuid=True), ForeignKey("departments.id"), nullable=False)
+    department_id = Column(PGUUID(as_uuid=True), ForeignKey("departments.id"), nullable=False, index=True)
     photo = Column(String(length=255), nullable=True)
     description = Column(Text, nullable=False)
     number_of_students = Column(Integer, nullable=False)
     department = relationship("Department", backref="deteriorations")
 
+
+class UniversityCard(Base):
+    """
+    Read model: everything a university card shows, as one JSONB document per university.
+
+    Rebuilt by the ``university_cards.refresh`` job (see ``univer.cards``) after writes to
+    universities, locations, regions, categories, comments and carts.
+    """
+    __tablename__ = "university_cards"
+
+    university_id = Column(PGUUID(as_uuid=True), ForeignKey("universities.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String(length=255), nullable=False)
+    category_id = Column(PGUUID(as_uuid=True), nullable=False)
+    location_id = Column(PGUUID(as_uuid=True), nullable=False)
+    card = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # One index per way the cards are listed, each in name order.
+        Index("ix_university_cards_name", "name"),
+        Index("ix_university_cards_category_name", "category_id", "name"),
+        Index("ix_university_cards_location_name", "location_id", "name"),
+    )
+
+
+class UniversitySimilarity(Base):
+    """
+    The top ``RECOMMENDATIONS_TOP_K`` universities saved by the same users as
+    ``university_id``, scored by cosine similarity of their cart columns.
+
+    Rebuilt by the ``universities.similar`` job (see ``univer.similar``) after cart writes.
+    """
+    __tablename__ = "university_similarities"
+
+    university_id = Column(PGUUID(as_uuid=True), ForeignKey("universities.id", ondelete="CASCADE"), primary_key=True)
+    similar_id = Column(PGUUID(as_uuid=True), ForeignKey("universities.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_university_similarities_university_score", university_id, score.desc()),
+        # Lets deleting a university's cascade find the rows that point at it.
+        Index("ix_university_similarities_similar_id", similar_id),
+    )
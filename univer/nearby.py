@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from sqlalchemy import func, select
+
+from database import async_session
+from geoindex import GeoIndex
+from settings import settings
+from location.models import Location
+from .models import University
+
+
+class NearbyIndex:
+    """
+    Every university with coordinates, its own or else its location's, in a ``GeoIndex``.
+
+    Built on first use from one query against the primary and rebuilt after
+    ``invalidate()`` or ``NEARBY_INDEX_TTL_SECONDS``, like ``location.tree.LocationTree``.
+    The tree itself is built in a thread so a large rebuild does not stall the event loop.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.index = None
+        self._built_at = 0.0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._version += 1
+        self.index = None
+
+    def _fresh(self) -> bool:
+        return self.index is not None and time.monotonic() - self._built_at < self.ttl
+
+    async def _build(self):
+        latitude = func.coalesce(University.latitude, Location.latitude)
+        longitude = func.coalesce(University.longitude, Location.longitude)
+        query = (
+            select(University.id, University.name, University.photo, latitude, longitude)
+            .join(Location, Location.id == University.location_id)
+            .where(latitude.is_not(None), longitude.is_not(None))
+        )
+        async with async_session() as db:
+            rows = (await db.execute(query)).all()
+
+        points = [(lat, lon, {"id": id, "name": name, "photo": photo}) for id, name, photo, lat, lon in rows]
+        return await asyncio.to_thread(GeoIndex, points)
+
+    async def get(self) -> GeoIndex:
+        if self._fresh():
+            return self.index
+        async with self._lock:
+            if self._fresh():
+                return self.index
+            version = self._version
+            index = await self._build()
+            if version == self._version:
+                self.index, self._built_at = index, time.monotonic()
+            return index
+
+
+nearby_index = NearbyIndex(settings.NEARBY_INDEX_TTL_SECONDS)
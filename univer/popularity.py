@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import async_session
+from jobs.queue import enqueue, job
+from settings import settings
+from cart.models import Cart
+from comment.models import Comment
+from .models import University
+
+
+REFRESH_JOB = "universities.popularity"
+
+# Scores are anchored at a fixed instant instead of "now": an event is worth
+# weight * 2 ** (days since the anchor / half-life). Dividing every score by the same
+# 2 ** (days since the anchor / half-life) gives the usual decayed score, so the order is
+# the same, but a stored score never goes stale and only universities that get a new
+# cart or comment need recomputing. A double holds this for about 80 years of 30-day
+# half-lives past the anchor.
+ANCHOR = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _events_score(model, weight: float):
+    half_lives = (func.extract("epoch", model.created_at) - ANCHOR.timestamp()) / (
+        settings.POPULARITY_HALF_LIFE_DAYS * 86400
+    )
+    return (
+        select(func.coalesce(func.sum(weight * func.power(2.0, half_lives)), 0.0))
+        .where(model.university_id == University.id)
+        .scalar_subquery()
+    )
+
+
+async def refresh_popularity(db: AsyncSession, university_ids=None):
+    """
+    Recompute ``University.popularity`` from carts and comments, for ``university_ids``
+    or every university. The caller commits.
+    """
+    stmt = update(University).values(
+        popularity=_events_score(Cart, settings.POPULARITY_CART_WEIGHT)
+        + _events_score(Comment, settings.POPULARITY_COMMENT_WEIGHT)
+    )
+    if university_ids is not None:
+        stmt = stmt.where(University.id.in_(university_ids))
+    await db.execute(stmt, execution_options={"synchronize_session": False})
+
+
+async def schedule_popularity_refresh(db: AsyncSession, university_ids=None):
+    """Queue a popularity refresh in ``db``'s transaction; with no ids every score is rebuilt."""
+    payload = {} if university_ids is None else {"university_ids": [str(id) for id in university_ids]}
+    await enqueue(db, REFRESH_JOB, payload)
+
+
+@job(REFRESH_JOB)
+async def _refresh_job(payload: dict):
+    async with async_session() as db:
+        await refresh_popularity(db, payload.get("university_ids"))
+        await db.commit()
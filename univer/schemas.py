@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, HttpUrl
+from pydantic import BaseModel, EmailStr, Field, HttpUrl
 from typing import Optional
 from uuid import UUID
 
@@ -14,6 +14,8 @@ class UniversityCreate(BaseModel):
     phone_number: str
     email: EmailStr
     webpage: HttpUrl
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class UniversityResponse1(BaseModel):
@@ -51,6 +53,8 @@ class UniversityResponse(BaseModel):
     email: Optional[EmailStr]
     webpage: Optional[HttpUrl]
     created_by_id: Optional[str]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -97,4 +101,52 @@ class DeteriorationResponse(DeteriorationBase):
     id: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CardRef(BaseModel):
+    id: UUID
+    name: str
+
+
+class UniversityCardResponse(BaseModel):
+    id: UUID
+    name: str
+    photo: Optional[str] = None
+    location: CardRef
+    region: CardRef
+    category: CardRef
+    comment_count: int
+    cart_count: int
+
+
+class FacetCount(BaseModel):
+    id: UUID
+    name: str
+    count: int
+
+
+class UniversityFacets(BaseModel):
+    category: list[FacetCount]
+    location: list[FacetCount]
+    region: list[FacetCount]
+
+
+class UniversityFacetPage(BaseModel):
+    items: list[UniversityResponse1]
+    total: int
+    facets: UniversityFacets
+
+
+class SimilarUniversity(BaseModel):
+    id: UUID
+    name: str
+    photo: Optional[str] = None
+    score: float
+
+
+class NearbyUniversity(BaseModel):
+    id: UUID
+    name: str
+    photo: Optional[str] = None
+    distance_km: float
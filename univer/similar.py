@@ -0,0 +1,155 @@
+from sqlalchemy import Float, delete, func, select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from database import async_session, lock_for_rebuild
+from jobs.queue import enqueue, job
+from settings import settings
+from cart.models import Cart
+from .models import University, UniversitySimilarity
+
+
+REFRESH_JOB = "universities.similar"
+LOCK_KEY = "university_similarities"
+
+
+def _similarity_rows(source_ids=None):
+    """
+    ``(university_id, similar_id, score)`` of the top-K neighbours of ``source_ids`` (or of
+    every university), computed by the database in one pass over ``carts``.
+
+    Each university is the set of users who saved it; two universities score
+    ``common users / sqrt(users of one * users of the other)``.
+    """
+    left, right = aliased(Cart), aliased(Cart)
+    pairs = (
+        select(
+            left.university_id.label("university_id"),
+            right.university_id.label("similar_id"),
+            func.count().label("common"),
+        )
+        .join(right, (right.user_id == left.user_id) & (right.university_id != left.university_id))
+        .group_by(left.university_id, right.university_id)
+    )
+    if source_ids is not None:
+        pairs = pairs.where(left.university_id.in_(source_ids))
+    pairs = pairs.cte("pairs")
+
+    savers = select(Cart.university_id, func.count().label("users")).group_by(Cart.university_id)
+    if source_ids is not None:
+        # Only the universities of the pairs being scored, not the whole carts table.
+        savers = savers.where(Cart.university_id.in_(
+            union(select(pairs.c.university_id), select(pairs.c.similar_id))
+        ))
+    savers = savers.cte("savers")
+    own, other = aliased(savers), aliased(savers)
+    score = (pairs.c.common.cast(Float) / func.sqrt((own.c.users * other.c.users).cast(Float), type_=Float)).label("score")
+    ranked = (
+        select(
+            pairs.c.university_id,
+            pairs.c.similar_id,
+            score,
+            func.row_number().over(
+                partition_by=pairs.c.university_id, order_by=(score.desc(), pairs.c.similar_id)
+            ).label("position"),
+        )
+        .join(own, own.c.university_id == pairs.c.university_id)
+        .join(other, other.c.university_id == pairs.c.similar_id)
+        .subquery()
+    )
+    return select(ranked.c.university_id, ranked.c.similar_id, ranked.c.score).where(
+        ranked.c.position <= settings.RECOMMENDATIONS_TOP_K
+    )
+
+
+async def refresh_similarities(db: AsyncSession, university_ids=None, user_ids=None):
+    """
+    Rebuild the neighbours of the universities a cart change can have affected, or of
+    every university when no ids are given. The caller commits.
+
+    A cart write on university A by user U changes A's saver count, which appears in the
+    score of every pair with A, so the rebuilt set is A, everything co-saved with A, and
+    the saved universities of ``user_ids`` (which may have just lost A as a neighbour).
+
+    Rebuilds of the same university are serialised (see ``database.lock_for_rebuild``), so
+    overlapping rebuilds never mix rows from two snapshots. The rebuilt set is found before
+    the locks are taken, and may miss a cart written meanwhile; that write queues its own
+    rebuild.
+    """
+    sources = None
+    if university_ids is not None:
+        co_saved = (
+            select(Cart.university_id)
+            .where(Cart.user_id.in_(select(Cart.user_id).where(Cart.university_id.in_(university_ids))))
+        )
+        affected = [co_saved, select(University.id).where(University.id.in_(university_ids))]
+        if user_ids:
+            affected.append(select(Cart.university_id).where(Cart.user_id.in_(user_ids)))
+        sources = (await db.execute(union(*affected))).scalars().all()
+    await lock_for_rebuild(db, LOCK_KEY, sources)
+
+    stmt = delete(UniversitySimilarity)
+    if sources is not None:
+        stmt = stmt.where(UniversitySimilarity.university_id.in_(sources))
+    await db.execute(stmt)
+    stmt = insert(UniversitySimilarity).from_select(
+        ["university_id", "similar_id", "score"], _similarity_rows(sources)
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[UniversitySimilarity.university_id, UniversitySimilarity.similar_id],
+        set_={"score": stmt.excluded.score},
+    ))
+
+
+async def schedule_similarity_refresh(db: AsyncSession, university_ids=None, user_ids=None):
+    """Queue a neighbour rebuild in ``db``'s transaction; with no ids every university is rebuilt."""
+    payload = {}
+    if university_ids is not None:
+        payload["university_ids"] = [str(id) for id in university_ids]
+    if user_ids is not None:
+        payload["user_ids"] = [str(id) for id in user_ids]
+    await enqueue(db, REFRESH_JOB, payload)
+
+
+def similar_universities(university_id, limit: int):
+    """The stored neighbours of ``university_id``, best first, read through one index range."""
+    return (
+        select(University.id, University.name, University.photo, UniversitySimilarity.score)
+        .join(University, University.id == UniversitySimilarity.similar_id)
+        .where(UniversitySimilarity.university_id == university_id)
+        .order_by(UniversitySimilarity.score.desc())
+        .limit(limit)
+    )
+
+
+def recommended_universities(user_id, limit: int):
+    """
+    Universities similar to those ``user_id`` saved and not saved yet, scored by the sum
+    of their similarities to the user's saved universities.
+    """
+    saved = select(Cart.university_id).where(Cart.user_id == user_id)
+    score = func.sum(UniversitySimilarity.score).label("score")
+    suggestions = (
+        select(UniversitySimilarity.similar_id, score)
+        .where(UniversitySimilarity.university_id.in_(saved), UniversitySimilarity.similar_id.not_in(saved))
+        .group_by(UniversitySimilarity.similar_id)
+        .order_by(score.desc(), UniversitySimilarity.similar_id)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        select(University.id, University.name, University.photo, suggestions.c.score)
+        .join(suggestions, suggestions.c.similar_id == University.id)
+        .order_by(suggestions.c.score.desc(), University.id)
+    )
+
+
+@job(REFRESH_JOB)
+async def _refresh_job(payload: dict):
+    async with async_session() as db:
+        user_ids = payload.get("user_ids")
+        if "user_id" in payload:  # Jobs queued before user_ids.
+            user_ids = [payload["user_id"]]
+        await refresh_similarities(db, payload.get("university_ids"), user_ids)
+        await db.commit()
@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from category.models import Category
 from location.models import Location
 from .models import *
-from user.models import Users
-from sqlalchemy import update, delete
+from user.models import user_by_id
 from .schemas import *
-from database import get_db
+from database import get_db, get_read_db, insert_returning, update_owned, delete_owned
+from singleflight import coalesce
+from fieldsets import Fieldset, sparse_fields
+from .cards import schedule_card_refresh
+from .facets import faceted_search
+from .popularity import schedule_popularity_refresh
+from .similar import recommended_universities, schedule_similarity_refresh, similar_universities
+from .nearby import nearby_index
+from dependency import get_current_staff_user
 from user.jwt_auth import JWTBearer, JWTAuth
-from typing import List
+from typing import List, Literal, Optional
 from uuid import UUID
 import logging
 
@@ -20,6 +28,17 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 jwt_auth = JWTAuth()
 
+university_fields = sparse_fields(University, UniversityResponse, default=UniversityResponse1)
+university_detail_fields = sparse_fields(University, UniversityResponse)
+department_fields = sparse_fields(Department, DepartmentResponse)
+deterioration_fields = sparse_fields(Deterioration, DeteriorationResponse)
+
+UniversitySort = Literal["name", "popular"]
+university_order = {
+    "name": (University.name, University.id),
+    "popular": (University.popularity.desc(), University.id),
+}
+
 
 
 @router.post("/university_create/", response_model=UniversityResponse, status_code=status.HTTP_201_CREATED)
@@ -28,7 +47,7 @@ async def create_university(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(JWTBearer(jwt_auth))
 ):
-    logger.info("Creating university with data: %s", university.dict())
+    logger.info("Creating university %s", university.name)
     payload = jwt_auth.decode_token(token)
     current_user_id = payload.get("user_id")
 
@@ -38,7 +57,7 @@ async def create_university(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(Users).where(Users.id == current_user_id))
+    result = await db.execute(user_by_id, {"user_id": current_user_id})
     user = result.scalar()
     if not user or not user.status:
         raise HTTPException(
@@ -83,25 +102,28 @@ async def create_university(
             detail="A university with this phone number or email already exists"
         )
 
-    # Convert HttpUrl to strings
-    new_university = University(
-        name=university.name,
-        photo=str(university.photo) if university.photo else None,
-        location_id=university.location_id,
-        category_id=university.category_id,
-        description=university.description,
-        video=str(university.video) if university.video else None,
-        amount_of_students=university.amount_of_students,
-        phone_number=university.phone_number,
-        email=university.email,
-        webpage=str(university.webpage) if university.webpage else None,
-        created_by_id=current_user_id
-    )
-
-    db.add(new_university)
     try:
+        # Convert HttpUrl to strings
+        new_university = await insert_returning(
+            db,
+            University,
+            name=university.name,
+            photo=str(university.photo) if university.photo else None,
+            location_id=university.location_id,
+            category_id=university.category_id,
+            description=university.description,
+            video=str(university.video) if university.video else None,
+            amount_of_students=university.amount_of_students,
+            phone_number=university.phone_number,
+            email=university.email,
+            webpage=str(university.webpage) if university.webpage else None,
+            latitude=university.latitude,
+            longitude=university.longitude,
+            created_by_id=current_user_id
+        )
+        await schedule_card_refresh(db, university_ids=[new_university.id])
         await db.commit()
-        await db.refresh(new_university)
+        nearby_index.invalidate()
     except Exception as e:
         await db.rollback()
         logger.error(f"Failed to create university: {str(e)}")
@@ -122,7 +144,9 @@ async def create_university(
         phone_number=new_university.phone_number,
         email=new_university.email,
         webpage=new_university.webpage,
-        created_by_id=str(new_university.created_by_id)
+        created_by_id=str(new_university.created_by_id),
+        latitude=new_university.latitude,
+        longitude=new_university.longitude,
     )
 
 
@@ -144,21 +168,6 @@ async def update_university(
             detail="User not authenticated"
         )
 
-    result = await db.execute(select(University).where(University.id == university_id))
-    existing_university = result.scalar()
-    if not existing_university:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="University not found"
-        )
-
-    if existing_university.created_by_id != UUID(current_user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to update this university"
-        )
-
-
     existing_university_by_name = await db.execute(
         select(University).where(University.name == university.name, University.id != university_id)
     )
@@ -171,25 +180,37 @@ async def update_university(
         )
 
     try:
-        query = (
-            update(University)
-            .where(University.id == university_id)
-            .values(
-                name=university.name,
-                photo=str(university.photo) if university.photo else None,
-                location_id=university.location_id,
-                category_id=university.category_id,
-                description=university.description,
-                video=str(university.video) if university.video else None,
-                amount_of_students=university.amount_of_students,
-                phone_number=university.phone_number,
-                email=university.email,
-                webpage=str(university.webpage),
-            )
-        )
-        await db.execute(query)
+        values = dict(
+            name=university.name,
+            photo=str(university.photo) if university.photo else None,
+            location_id=university.location_id,
+            category_id=university.category_id,
+            description=university.description,
+            video=str(university.video) if university.video else None,
+            amount_of_students=university.amount_of_students,
+            phone_number=university.phone_number,
+            email=university.email,
+            webpage=str(university.webpage),
+        )
+        # Coordinates are only changed when sent, so clients that do not know about them keep them.
+        for field in ("latitude", "longitude"):
+            if field in university.model_fields_set:
+                values[field] = getattr(university, field)
+        await update_owned(
+            db,
+            University,
+            university_id,
+            University.created_by_id == UUID(current_user_id),
+            values=values,
+            not_found="University not found",
+            forbidden="You do not have permission to update this university",
+        )
+        await schedule_card_refresh(db, university_ids=[university_id])
         await db.commit()
+        nearby_index.invalidate()
 
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -206,24 +227,16 @@ async def update_university(
 
 
 @router.get("/search_universities_by_name/{name}/", response_model=list[UniversityResponse1])
+@coalesce
 async def search_universities_by_name(
     name: str,
-    db: AsyncSession = Depends(get_db)
+    fieldset: Fieldset = Depends(university_fields),
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
 
-        result = await db.execute(select(University).where(University.name.ilike(f"%{name}%")))
-        universities = result.scalars().all()
-
-        return [
-            {
-                "id": str(university.id),
-                "name": university.name,
-                "photo": university.photo,
-                # Add other fields if needed
-            }
-            for university in universities
-        ]
+        result = await db.execute(fieldset.select().where(University.name.ilike(f"%{name}%")))
+        return fieldset.respond(result.mappings().all())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -250,25 +263,19 @@ async def delete_university(
             detail="User not authenticated"
         )
 
-
-    result = await db.execute(select(University).where(University.id == university_id))
-    existing_university = result.scalar()
-    if not existing_university:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="University not found"
-        )
-
-
-    if existing_university.created_by_id != UUID(current_user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to delete this university"
-        )
-
     try:
-        await db.execute(delete(University).where(University.id == university_id))
+        await delete_owned(
+            db,
+            University,
+            university_id,
+            University.created_by_id == UUID(current_user_id),
+            not_found="University not found",
+            forbidden="You do not have permission to delete this university",
+        )
         await db.commit()
+        nearby_index.invalidate()
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -281,7 +288,9 @@ async def delete_university(
 
 @router.get("/my_university_list/", response_model=list[UniversityResponse])
 async def list_universities(
-    db: AsyncSession = Depends(get_db),
+    sort: Optional[UniversitySort] = None,
+    fieldset: Fieldset = Depends(university_detail_fields),
+    db: AsyncSession = Depends(get_read_db),
     token: str = Depends(JWTBearer(jwt_auth))
 ):
     payload = jwt_auth.decode_token(token)
@@ -293,57 +302,28 @@ async def list_universities(
         )
 
 
-    result = await db.execute(select(University).where(University.created_by_id == UUID(current_user_id)))
-    universities = result.scalars().all()
-
-    return [
-        {
-            "id": str(university.id),
-            "name": university.name,
-            "photo": university.photo,
-            "location_id": str(university.location_id),
-            "category_id": str(university.category_id),
-            "description": university.description,
-            "video": university.video,
-            "amount_of_students": university.amount_of_students,
-            "phone_number": university.phone_number,
-            "email": university.email,
-            "webpage": university.webpage,
-            "created_by_id": str(university.created_by_id),
-
-        }
-        for university in universities
-    ]
+    query = fieldset.select_where("created_by_id")
+    if sort:
+        query = query.order_by(*university_order[sort])
+    result = await db.execute(query, {"created_by_id": UUID(current_user_id)})
+    return fieldset.respond(result.mappings().all())
 
 
 
 
 @router.get("/universities_list/", response_model=list[UniversityResponse1])
+@coalesce
 async def list_universities(
-    db: AsyncSession = Depends(get_db)
+    sort: Optional[UniversitySort] = None,
+    fieldset: Fieldset = Depends(university_fields),
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
-
-        result = await db.execute(select(University))
-        universities = result.scalars().all()
-
-
-        return [
-            {
-                "id": str(university.id),
-                "name": university.name,
-                "photo": university.photo,
-                # "location_id": str(university.location_id),
-                # "category_id": str(university.category_id),
-                # "description": university.description,
-                # "amount_of_students": university.amount_of_students,
-                # "phone_number": university.phone_number,
-                # "email": university.email,
-                # "webpage": university.webpage,
-                # "created_by_id": str(university.created_by_id),
-            }
-            for university in universities
-        ]
+        query = fieldset.select()
+        if sort:
+            query = query.order_by(*university_order[sort])
+        result = await db.execute(query)
+        return fieldset.respond(result.mappings().all())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -352,23 +332,19 @@ async def list_universities(
 
 
 @router.get("/universities_by_category/{category_id}/", response_model=list[UniversityResponse1])
+@coalesce
 async def universities_by_category(
     category_id: str,
-    db: AsyncSession = Depends(get_db)
+    sort: Optional[UniversitySort] = None,
+    fieldset: Fieldset = Depends(university_fields),
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        result = await db.execute(select(University).where(University.category_id == category_id))
-        universities = result.scalars().all()
-
-        return [
-            {
-                "id": str(university.id),
-                "name": university.name,
-                "photo": university.photo,
-
-            }
-            for university in universities
-        ]
+        query = fieldset.select_where("category_id")
+        if sort:
+            query = query.order_by(*university_order[sort])
+        result = await db.execute(query, {"category_id": category_id})
+        return fieldset.respond(result.mappings().all())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -378,23 +354,19 @@ async def universities_by_category(
 
 
 @router.get("/universities_by_location/{location_id}/", response_model=list[UniversityResponse1])
+@coalesce
 async def universities_by_location(
     location_id: str,
-    db: AsyncSession = Depends(get_db)
+    sort: Optional[UniversitySort] = None,
+    fieldset: Fieldset = Depends(university_fields),
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
-        result = await db.execute(select(University).where(University.location_id == location_id))
-        universities = result.scalars().all()
-
-        return [
-            {
-                "id": str(university.id),
-                "name": university.name,
-                "photo": university.photo,
-
-            }
-            for university in universities
-        ]
+        query = fieldset.select_where("location_id")
+        if sort:
+            query = query.order_by(*university_order[sort])
+        result = await db.execute(query, {"location_id": location_id})
+        return fieldset.respond(result.mappings().all())
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -403,14 +375,117 @@ async def universities_by_location(
 
 
 
+@router.get("/universities_faceted/", response_model=UniversityFacetPage)
+@coalesce
+async def universities_faceted(
+    category_id: List[UUID] = Query([]),
+    location_id: List[UUID] = Query([]),
+    region_id: List[UUID] = Query([]),
+    min_students: Optional[int] = Query(None, ge=0),
+    max_students: Optional[int] = Query(None, ge=0),
+    sort: UniversitySort = "name",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Universities filtered by any combination of categories, locations, regions and a
+    student-count range, with the number of matches per category, location and region.
+    Repeat a parameter to select several values of the same facet.
+    """
+    if min_students is not None and max_students is not None and min_students > max_students:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_students cannot be greater than max_students"
+        )
+
+    # The page and the counts arrive as JSON already; pass them through without re-validating.
+    return JSONResponse(await faceted_search(
+        db,
+        category_ids=category_id,
+        location_ids=location_id,
+        region_ids=region_id,
+        min_students=min_students,
+        max_students=max_students,
+        order_by=university_order[sort],
+        limit=limit,
+        offset=offset,
+    ))
+
+
+
+@router.get("/university/{university_id}/similar/", response_model=List[SimilarUniversity])
+@coalesce
+async def university_similar(
+    university_id: UUID,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Universities most often saved by the users who saved this one."""
+    result = await db.execute(similar_universities(university_id, limit))
+    return result.mappings().all()
+
+
+@router.get("/recommended_universities/", response_model=List[SimilarUniversity])
+async def recommended_for_me(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    token: str = Depends(JWTBearer(jwt_auth))
+):
+    """
+    Suggestions built from the universities in the user's cart; a user with nothing
+    saved, or nothing similar to it, gets the most popular universities.
+    """
+    payload = jwt_auth.decode_token(token)
+    current_user_id = payload.get("user_id")
+    if not current_user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not authenticated"
+        )
+
+    result = await db.execute(recommended_universities(UUID(current_user_id), limit))
+    rows = result.mappings().all()
+    if not rows:
+        result = await db.execute(
+            select(University.id, University.name, University.photo, University.popularity.label("score"))
+            .order_by(*university_order["popular"])
+            .limit(limit)
+        )
+        rows = result.mappings().all()
+    return rows
+
+
+
+@router.get("/universities_nearby/", response_model=List[NearbyUniversity])
+async def universities_nearby(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    limit: int = Query(10, ge=1, le=100),
+    radius_km: Optional[float] = Query(None, gt=0),
+):
+    """
+    The ``limit`` universities nearest to a point, optionally only those within
+    ``radius_km``, nearest first. Served from the in-memory geo index.
+    """
+    index = await nearby_index.get()
+    return [
+        {**university, "distance_km": round(distance, 3)}
+        for distance, university in index.nearest(latitude, longitude, limit, radius_km)
+    ]
+
+
+
 @router.get("/university_detail/{university_id}/", response_model=UniversityResponse)
+@coalesce
 async def get_university_detail(
     university_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    fieldset: Fieldset = Depends(university_detail_fields),
+    db: AsyncSession = Depends(get_read_db)
 ):
 
-    result = await db.execute(select(University).where(University.id == university_id))
-    university = result.scalar()
+    result = await db.execute(fieldset.select_where("id"), {"id": university_id})
+    university = result.mappings().first()
 
     if not university:
         raise HTTPException(
@@ -419,20 +494,7 @@ async def get_university_detail(
         )
 
 
-    return {
-        "id": str(university.id),
-        "name": university.name,
-        "photo": university.photo,
-        "location_id": str(university.location_id),
-        "category_id": str(university.category_id),
-        "description": university.description,
-        "video": university.video,
-        "amount_of_students": university.amount_of_students,
-        "phone_number": university.phone_number,
-        "email": university.email,
-        "webpage": university.webpage,
-        "created_by_id": str(university.created_by_id),
-    }
+    return fieldset.respond(university)
 
 ##########################################################################################################################
 
@@ -484,17 +546,16 @@ async def create_department(
             detail="A department with this name already exists"
         )
 
-    new_department = Department(
-        name=department.name,
-        photo=str(department.photo) if department.photo else None,
-        description=department.description,
-        university_id=department.university_id
-    )
-
-    db.add(new_department)
     try:
+        new_department = await insert_returning(
+            db,
+            Department,
+            name=department.name,
+            photo=str(department.photo) if department.photo else None,
+            description=department.description,
+            university_id=department.university_id
+        )
         await db.commit()
-        await db.refresh(new_department)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -520,17 +581,19 @@ async def create_department(
 
 
 @router.get("/department_detail/{department_id}/", response_model=DepartmentResponse, status_code=status.HTTP_200_OK)
+@coalesce
 async def department_detail(
     department_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    fieldset: Fieldset = Depends(department_fields),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    logger.info(f"Fetching details for department with ID: {department_id}")
+    logger.debug("Fetching details for department with ID: %s", department_id)
 
 
     result = await db.execute(
-        select(Department).where(Department.id == department_id)
+        fieldset.select_where("id"), {"id": department_id}
     )
-    department = result.scalar()
+    department = result.mappings().first()
 
     if not department:
         logger.warning(f"No department found with ID: {department_id}")
@@ -540,12 +603,7 @@ async def department_detail(
         )
 
 
-    return {
-        "id": str(department.id),
-        "name": department.name,
-        "description": department.description,
-        "university_id": str(department.university_id) if department.university_id else None,
-    }
+    return fieldset.respond(department)
 
 
 @router.put("/department_update/{department_id}", response_model=DepartmentResponse, status_code=status.HTTP_200_OK)
@@ -571,14 +629,6 @@ async def update_department(
             detail="Only staff users can update a department"
         )
 
-    department_to_update = await db.execute(select(Department).where(Department.id == department_id))
-    department_to_update = department_to_update.scalar()
-    if not department_to_update:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Department not found"
-        )
-
     existing_department = await db.execute(
         select(Department).where(Department.name == department.name, Department.id != department_id)
     )
@@ -589,15 +639,22 @@ async def update_department(
             detail="A department with this name already exists"
         )
 
-    department_to_update.name = department.name
-    department_to_update.photo = str(department.photo) if department.photo else None
-    department_to_update.description = department.description
-    department_to_update.university_id = department.university_id
-
-    db.add(department_to_update)
     try:
+        department_to_update = await update_owned(
+            db,
+            Department,
+            department_id,
+            values=dict(
+                name=department.name,
+                photo=str(department.photo) if department.photo else None,
+                description=department.description,
+                university_id=department.university_id
+            ),
+            not_found="Department not found",
+        )
         await db.commit()
-        await db.refresh(department_to_update)
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -637,17 +694,11 @@ async def delete_department(
             detail="Only staff users can delete a department"
         )
 
-    department_to_delete = await db.execute(select(Department).where(Department.id == department_id))
-    department_to_delete = department_to_delete.scalar()
-    if not department_to_delete:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Department not found"
-        )
-
     try:
-        await db.delete(department_to_delete)
+        await delete_owned(db, Department, department_id, not_found="Department not found")
         await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -662,13 +713,15 @@ async def delete_department(
 
 
 @router.get("/departments_list/{university_id}", response_model=List[DepartmentResponse], status_code=status.HTTP_200_OK)
+@coalesce
 async def list_departments(
     university_id: str,
-    db: AsyncSession = Depends(get_db),
+    fieldset: Fieldset = Depends(department_fields),
+    db: AsyncSession = Depends(get_read_db),
 ):
 
-    result = await db.execute(select(Department).where(Department.university_id == university_id))
-    departments = result.scalars().all()
+    result = await db.execute(fieldset.select_where("university_id"), {"university_id": university_id})
+    departments = result.mappings().all()
 
 
     if not departments:
@@ -678,16 +731,7 @@ async def list_departments(
         )
 
 
-    return [
-        DepartmentResponse(
-            id=str(department.id),
-            name=department.name,
-            photo=department.photo,
-            description=department.description,
-            university_id=str(department.university_id)
-        )
-        for department in departments
-    ]
+    return fieldset.respond(departments)
 #################################################################################################################
 
 @router.post("/deterioration_create/", response_model=DeteriorationResponse, status_code=status.HTTP_201_CREATED)
@@ -736,18 +780,17 @@ async def create_deterioration(
         )
 
 
-    new_deterioration = Deterioration(
-        name=deterioration.name,
-        department_id=deterioration.department_id,
-        photo=deterioration.photo,
-        description=deterioration.description,
-        number_of_students=deterioration.number_of_students,
-    )
-    db.add(new_deterioration)
-
     try:
+        new_deterioration = await insert_returning(
+            db,
+            Deterioration,
+            name=deterioration.name,
+            department_id=deterioration.department_id,
+            photo=deterioration.photo,
+            description=deterioration.description,
+            number_of_students=deterioration.number_of_students,
+        )
         await db.commit()
-        await db.refresh(new_deterioration)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -768,17 +811,19 @@ async def create_deterioration(
 
 
 @router.get("/deterioration_detail/{deterioration_id}/", response_model=DeteriorationResponse, status_code=status.HTTP_200_OK)
+@coalesce
 async def deterioration_detail(
     deterioration_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    fieldset: Fieldset = Depends(deterioration_fields),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    logger.info(f"Fetching details for deterioration with ID: {deterioration_id}")
+    logger.debug("Fetching details for deterioration with ID: %s", deterioration_id)
 
 
     result = await db.execute(
-        select(Deterioration).where(Deterioration.id == deterioration_id)
+        fieldset.select_where("id"), {"id": deterioration_id}
     )
-    deterioration = result.scalar()
+    deterioration = result.mappings().first()
 
     if not deterioration:
         logger.warning(f"No deterioration found with ID: {deterioration_id}")
@@ -788,14 +833,7 @@ async def deterioration_detail(
         )
 
 
-    return {
-        "id": str(deterioration.id),
-        "name": deterioration.name,
-        "description": deterioration.description,
-        "department_id": str(deterioration.department_id) if deterioration.department_id else None,
-        "photo": deterioration.photo,
-        "number_of_students": deterioration.number_of_students,
-    }
+    return fieldset.respond(deterioration)
 
 
 
@@ -822,15 +860,6 @@ async def update_deterioration(
             detail="Only staff users are authorized to perform this action"
         )
 
-    deterioration_to_update = await db.execute(select(Deterioration).where(Deterioration.id == deterioration_id))
-    deterioration_to_update = deterioration_to_update.scalar()
-
-    if not deterioration_to_update:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Deterioration not found"
-        )
-
     department = await db.execute(select(Department).where(Department.id == deterioration.department_id))
     department = department.scalar()
 
@@ -840,27 +869,34 @@ async def update_deterioration(
             detail="Department not found"
         )
 
-    if deterioration_to_update.name != deterioration.name:
-        existing_deterioration = await db.execute(
-            select(Deterioration).where(Deterioration.name == deterioration.name)
-        )
-        existing_deterioration = existing_deterioration.scalar()
-
-        if existing_deterioration:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Deterioration with this name already exists"
-            )
+    existing_deterioration = await db.execute(
+        select(Deterioration).where(Deterioration.name == deterioration.name, Deterioration.id != deterioration_id)
+    )
+    existing_deterioration = existing_deterioration.scalar()
 
-    deterioration_to_update.name = deterioration.name
-    deterioration_to_update.department_id = deterioration.department_id
-    deterioration_to_update.photo = deterioration.photo
-    deterioration_to_update.description = deterioration.description
-    deterioration_to_update.number_of_students = deterioration.number_of_students
+    if existing_deterioration:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Deterioration with this name already exists"
+        )
 
     try:
+        deterioration_to_update = await update_owned(
+            db,
+            Deterioration,
+            deterioration_id,
+            values=dict(
+                name=deterioration.name,
+                department_id=deterioration.department_id,
+                photo=deterioration.photo,
+                description=deterioration.description,
+                number_of_students=deterioration.number_of_students,
+            ),
+            not_found="Deterioration not found",
+        )
         await db.commit()
-        await db.refresh(deterioration_to_update)
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -899,18 +935,11 @@ async def delete_deterioration(
             detail="Only staff users are authorized to perform this action"
         )
 
-    deterioration_to_delete = await db.execute(select(Deterioration).where(Deterioration.id == deterioration_id))
-    deterioration_to_delete = deterioration_to_delete.scalar()
-
-    if not deterioration_to_delete:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Deterioration not found"
-        )
-
     try:
-        await db.delete(deterioration_to_delete)
+        await delete_owned(db, Deterioration, deterioration_id, not_found="Deterioration not found")
         await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -923,12 +952,14 @@ async def delete_deterioration(
 
 
 @router.get("/deteriorations_list/{department_id}", response_model=List[DeteriorationResponse], status_code=status.HTTP_200_OK)
+@coalesce
 async def list_deteriorations(
     department_id: str,
-    db: AsyncSession = Depends(get_db),
+    fieldset: Fieldset = Depends(deterioration_fields),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    result = await db.execute(select(Deterioration).where(Deterioration.department_id == department_id))
-    deteriorations = result.scalars().all()
+    result = await db.execute(fieldset.select_where("department_id"), {"department_id": department_id})
+    deteriorations = result.mappings().all()
 
     if not deteriorations:
         raise HTTPException(
@@ -936,14 +967,60 @@ async def list_deteriorations(
             detail="No deteriorations found for the specified department."
         )
 
-    return [
-        DeteriorationResponse(
-            id=str(deterioration.id),
-            name=deterioration.name,
-            department_id=str(deterioration.department_id),
-            photo=deterioration.photo,
-            description=deterioration.description,
-            number_of_students=deterioration.number_of_students,
-        )
-        for deterioration in deteriorations
-    ]
+    return fieldset.respond(deteriorations)
+
+
+
+@router.get("/university_cards/", response_model=List[UniversityCardResponse])
+@coalesce
+async def university_cards(
+    category_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Complete university cards (location, region, category, comment and cart counts) in
+    name order, read from the ``university_cards`` read model with one index scan.
+    """
+    query = select(UniversityCard.card)
+    if category_id:
+        query = query.where(UniversityCard.category_id == category_id)
+    if location_id:
+        query = query.where(UniversityCard.location_id == location_id)
+
+    result = await db.execute(query.order_by(UniversityCard.name).offset(offset).limit(limit))
+    # Cards are stored as JSON already; pass them through without re-validating.
+    return JSONResponse(result.scalars().all())
+
+
+@router.post("/university_cards/rebuild/", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_university_cards(
+    db: AsyncSession = Depends(get_db),
+    staff_user=Depends(get_current_staff_user),
+):
+    await schedule_card_refresh(db)
+    await db.commit()
+    return {"message": "University cards rebuild scheduled"}
+
+
+@router.post("/universities_popularity/rebuild/", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_universities_popularity(
+    db: AsyncSession = Depends(get_db),
+    staff_user=Depends(get_current_staff_user),
+):
+    # Needed after changing the POPULARITY_* weights; new carts and comments update their university on their own.
+    await schedule_popularity_refresh(db)
+    await db.commit()
+    return {"message": "Popularity rebuild scheduled"}
+
+
+@router.post("/university_similar/rebuild/", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_university_similar(
+    db: AsyncSession = Depends(get_db),
+    staff_user=Depends(get_current_staff_user),
+):
+    await schedule_similarity_refresh(db)
+    await db.commit()
+    return {"message": "Similar universities rebuild scheduled"}
@@ -1,15 +1,92 @@
+import asyncio
 import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 
 import jwt
 import logging
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+from database import async_session
 from settings import settings
+from .models import TokenRevocation
 
 
 logger = logging.getLogger(__name__)
 
 
+class TokenCache:
+    """
+    LRU of already verified token payloads, keyed by the token string itself.
+
+    An entry lives until the token's own ``expire`` or ``ttl`` seconds, whichever comes
+    first, so revocations made by other workers are picked up within ``ttl``.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, token: str):
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        payload, valid_until = entry
+        if valid_until < time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return payload
+
+    def put(self, token: str, payload: dict):
+        self._entries[token] = (payload, min(payload["expire"], time.time() + self.ttl))
+        self._entries.move_to_end(token)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        self._entries.pop(token, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class RevocationList:
+    """
+    In-memory mirror of the ``token_revocations`` table: user id -> the issue time up to
+    which that user's tokens are revoked.
+    """
+
+    def __init__(self):
+        self._issued_before = {}
+
+    def add(self, user_id: str, issued_before: float):
+        self._issued_before[user_id] = max(issued_before, self._issued_before.get(user_id, 0.0))
+
+    def revokes(self, payload: dict) -> bool:
+        issued_before = self._issued_before.get(str(payload.get("user_id")))
+        # Tokens from before ``issued_at`` was added count as issued at the epoch.
+        return issued_before is not None and payload.get("issued_at", 0.0) <= issued_before
+
+    def replace(self, issued_before: dict):
+        # Keep revocations made here in the last moments: their rows may not have been
+        # committed yet when ``issued_before`` was read.
+        recent = time.time() - 2 * settings.TOKEN_REVOCATION_REFRESH_SECONDS
+        for user_id, local in self._issued_before.items():
+            if local > recent and local > issued_before.get(user_id, 0.0):
+                issued_before[user_id] = local
+        self._issued_before = issued_before
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+revoked_tokens = RevocationList()
+
+
 class JWTAuth:
     def __init__(self, secret_key: str = settings.SECRET_KEY, algorithm: str = settings.ALGORITHM,
                  access_token_expire_minutes: int = settings.ACCESS_TOKEN_EXPIRE_MINUTES,
@@ -18,20 +95,32 @@ class JWTAuth:
         self.algorithm = algorithm
         self.access_token_expire_minutes = access_token_expire_minutes
         self.refresh_token_expire_minutes = refresh_token_expire_minutes
+        # Instances with the application's key share one cache, so a request that
+        # verifies its token in JWTBearer and again in the view only pays for it once.
+        if secret_key == settings.SECRET_KEY and algorithm == settings.ALGORITHM:
+            self.token_cache = token_cache
+        else:
+            self.token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
 
-    def login_jwt(self, user_id: str):
+    def login_jwt(self, user_id: str, staff: bool = False):
 
+        now = time.time()
         access_payload = {
             "user_id": user_id,
-            "expire": time.time() + self.access_token_expire_minutes
+            "issued_at": now,
+            "expire": now + self.access_token_expire_minutes
         }
+        if staff:
+            # Only a scheduling hint for admission control; permissions are still checked against the DB.
+            access_payload["staff"] = True
         access_token = jwt.encode(access_payload, self.secret_key, algorithm=self.algorithm)
 
 
 
         refresh_payload = {
             "user_id": user_id,
-            "expire": time.time() + self.refresh_token_expire_minutes
+            "issued_at": now,
+            "expire": now + self.refresh_token_expire_minutes
         }
         refresh_token = jwt.encode(refresh_payload, self.secret_key, algorithm=self.algorithm)
 
@@ -43,7 +132,7 @@ class JWTAuth:
 
     def new_refresh_token(self, user_id: str, role: str, expire_time: float):
         new_access_token = jwt.encode(
-            {"user_id": user_id, "role": role, "expire": expire_time},
+            {"user_id": user_id, "role": role, "issued_at": time.time(), "expire": expire_time},
             self.secret_key,
             algorithm=self.algorithm,
         )
@@ -51,9 +140,13 @@ class JWTAuth:
         return {"access_token": new_access_token, "token_type": "Bearer"}
 
     def decode_token(self, token: str):
+        decoded_token = self.token_cache.get(token)
+        if decoded_token is not None:
+            return decoded_token
         try:
             decoded_token = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            if decoded_token["expire"] >= time.time():
+            if decoded_token["expire"] >= time.time() and not revoked_tokens.revokes(decoded_token):
+                self.token_cache.put(token, decoded_token)
                 return decoded_token
         except Exception as err:
             logger.info(err)
@@ -73,7 +166,7 @@ class JWTBearer(HTTPBearer):
     async def __call__(self, request: Request):
         credentials: HTTPAuthorizationCredentials = await super(JWTBearer, self).__call__(request)
         if credentials:
-            logger.debug(f"Credentials are provided: {credentials}")
+            logger.debug("Credentials are provided")
             if credentials.scheme != "Bearer":
                 logger.debug("Scheme is not Bearer")
                 raise self.credentials_exception
@@ -90,10 +183,67 @@ class JWTBearer(HTTPBearer):
     def verify_jwt(self, jwt_token: str):
         payload = self.jwt_auth.decode_token(jwt_token)
         if payload:
-            logger.info("Payload is valid")
+            logger.debug("Payload is valid")
             return True
         else:
             logger.debug("Payload is not valid")
             return False
 
 
+async def revoke_user_tokens(db, user_id):
+    """
+    Revoke every token issued to ``user_id`` so far, access and refresh alike, e.g. after
+    a password change. The caller commits; the revocation takes effect in this worker once
+    that commit succeeds and in the others within ``TOKEN_REVOCATION_REFRESH_SECONDS``.
+    """
+    now = time.time()
+    # No token issued before now outlives the longer of the two lifetimes.
+    longest = max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    stmt = insert(TokenRevocation).values(
+        user_id=user_id,
+        issued_before=datetime.fromtimestamp(now, timezone.utc),
+        expires_at=datetime.fromtimestamp(now + longest, timezone.utc),
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[TokenRevocation.user_id],
+        set_={"issued_before": stmt.excluded.issued_before, "expires_at": stmt.excluded.expires_at},
+    ))
+    db.info.setdefault("revoked_users", {})[str(user_id)] = now
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session):
+    revoked = session.info.pop("revoked_users", None)
+    if not revoked:
+        return
+    for user_id, issued_before in revoked.items():
+        revoked_tokens.add(user_id, issued_before)
+    token_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_revocations(session):
+    session.info.pop("revoked_users", None)
+
+
+async def load_revoked_tokens():
+    now = datetime.now(timezone.utc)
+    async with async_session() as db:
+        result = await db.execute(
+            select(TokenRevocation.user_id, TokenRevocation.issued_before).where(TokenRevocation.expires_at > now)
+        )
+        revoked = {str(user_id): issued_before.timestamp() for user_id, issued_before in result}
+    previous = revoked_tokens._issued_before
+    revoked_tokens.replace(revoked)
+    if any(issued_before > previous.get(user_id, 0.0) for user_id, issued_before in revoked.items()):
+        # Another worker revoked something; cached payloads may belong to it.
+        token_cache.clear()
+
+
+async def refresh_revoked_tokens():
+    while True:
+        try:
+            await load_revoked_tokens()
+        except Exception as e:
+            logger.warning("Failed to load revoked tokens: %s", e)
+        await asyncio.sleep(settings.TOKEN_REVOCATION_REFRESH_SECONDS)
@@ -1,11 +1,17 @@
-from sqlalchemy import Column, String, DateTime, func, Boolean
+from sqlalchemy import Column, String, DateTime, func, Boolean, bindparam, select
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
-from passlib.context import CryptContext
+from functools import cache
 import uuid
 from database import Base
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@cache
+def get_pwd_context():
+    """The bcrypt password context, built on first use so passlib is not imported at startup."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 
@@ -27,9 +33,29 @@ class Users(Base):
     @staticmethod
     def verify_password(plain_password, hashed_password):
         """Verify if a plain password matches the hashed password."""
-        return pwd_context.verify(plain_password, hashed_password)
+        return get_pwd_context().verify(plain_password, hashed_password)
 
     @staticmethod
     def get_password_hash(password):
         """Hash the password using bcrypt."""
-        return pwd_context.hash(password)
+        return get_pwd_context().hash(password)
+
+
+# Hot lookups, built once and executed with their parameters, e.g.
+# ``db.execute(user_by_id, {"user_id": user_id})``.
+user_by_id = select(Users).where(Users.id == bindparam("user_id"))
+user_by_email = select(Users).where(Users.email == bindparam("email"))
+
+
+class TokenRevocation(Base):
+    """
+    Every token of ``user_id`` issued up to ``issued_before`` is revoked.
+
+    Not a foreign key, so the row outlives a deleted user's account; it can be dropped
+    once ``expires_at`` has passed, as no token it covers is valid by then anyway.
+    """
+    __tablename__ = 'token_revocations'
+
+    user_id = Column(PGUUID(as_uuid=True), primary_key=True)
+    issued_before = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-from database import get_db
-from .models import Users, pwd_context
+from database import get_db, insert_returning, update_returning
+from .models import Users, get_pwd_context, user_by_id, user_by_email
 from .schemas import UserCreate, UserAuth, UserBase, UserPassword
 from fastapi.encoders import jsonable_encoder
-from .jwt_auth import JWTAuth, JWTBearer
+from .jwt_auth import JWTAuth, JWTBearer, revoke_user_tokens
 from fastapi.responses import JSONResponse
 
 
@@ -16,7 +16,7 @@ jwt_auth = JWTAuth()
 @router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
-    result = await db.execute(select(Users).where(Users.email == user.email))
+    result = await db.execute(user_by_email, {"email": user.email})
     existing_user = result.scalar()
     if existing_user:
         raise HTTPException(
@@ -31,22 +31,20 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     is_staff = user.status if user.status is not None else False
 
 
-    new_user = Users(
-        email=user.email,
-        full_name=user.full_name,
-        phone_number=user.phone_number,
-        password=hashed_password,
-        status=is_staff,
-    )
-
-
     try:
-        db.add(new_user)
+        new_user = await insert_returning(
+            db,
+            Users,
+            email=user.email,
+            full_name=user.full_name,
+            phone_number=user.phone_number,
+            password=hashed_password,
+            status=is_staff,
+        )
         await db.commit()
-        await db.refresh(new_user)
 
 
-        tokens = JWTAuth().login_jwt(user_id=str(new_user.id))
+        tokens = JWTAuth().login_jwt(user_id=str(new_user.id), staff=new_user.status)
 
 
         user_data = jsonable_encoder(new_user)
@@ -68,12 +66,12 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
 @router.post('/user_login')
 async def user_login(user_data: UserAuth, db: AsyncSession = Depends(get_db)):
 
-    result = await db.execute(select(Users).where(Users.email == user_data.email))
+    result = await db.execute(user_by_email, {"email": user_data.email})
     user = result.scalar()
 
-    if user and pwd_context.verify(user_data.password, user.password):
+    if user and get_pwd_context().verify(user_data.password, user.password):
 
-        jwt_token = JWTAuth().login_jwt(str(user.id))
+        jwt_token = JWTAuth().login_jwt(str(user.id), staff=user.status)
         return jwt_token
     else:
 
@@ -97,7 +95,7 @@ async def user_detail(db: AsyncSession = Depends(get_db), jwt_token: str = Depen
     user_uuid = decoded_token.get("user_id")
 
 
-    result = await db.execute(select(Users).where(Users.id == user_uuid))
+    result = await db.execute(user_by_id, {"user_id": user_uuid})
     user = result.scalar()
 
     if not user:
@@ -131,7 +129,7 @@ async def update_user(user_data: UserBase, db: AsyncSession = Depends(get_db),
     user_uuid = decoded_token.get("user_id")
 
 
-    result = await db.execute(select(Users).where(Users.id == user_uuid))
+    result = await db.execute(user_by_id, {"user_id": user_uuid})
     user = result.scalar()
 
     if not user:
@@ -141,7 +139,7 @@ async def update_user(user_data: UserBase, db: AsyncSession = Depends(get_db),
         )
 
 
-    existing_user_result = await db.execute(select(Users).where(Users.email == user_data.email))
+    existing_user_result = await db.execute(user_by_email, {"email": user_data.email})
     existing_user = existing_user_result.scalar()
 
     if existing_user and existing_user.id != user.id:
@@ -151,15 +149,16 @@ async def update_user(user_data: UserBase, db: AsyncSession = Depends(get_db),
         )
 
 
-    user.full_name = user_data.full_name
-    user.phone_number = user_data.phone_number
-    user.email = user_data.email
-
-
     try:
-        db.add(user)
+        user = await update_returning(
+            db,
+            Users,
+            Users.id == user.id,
+            full_name=user_data.full_name,
+            phone_number=user_data.phone_number,
+            email=user_data.email,
+        )
         await db.commit()
-        await db.refresh(user)
 
 
         user_data = user.__dict__
@@ -190,7 +189,7 @@ async def update_password(user_data: UserPassword, db: AsyncSession = Depends(ge
     user_uuid = decoded_token.get("user_id")
 
 
-    result = await db.execute(select(Users).where(Users.id == user_uuid))
+    result = await db.execute(user_by_id, {"user_id": user_uuid})
     user = result.scalar()
 
     if not user:
@@ -200,22 +199,19 @@ async def update_password(user_data: UserPassword, db: AsyncSession = Depends(ge
         )
 
 
-    if not pwd_context.verify(user_data.old_password, user.password):
+    if not get_pwd_context().verify(user_data.old_password, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Old password is incorrect"
         )
 
 
-    new_hashed_password = pwd_context.hash(user_data.new_password)
-
-    user.password = new_hashed_password
-
+    new_hashed_password = get_pwd_context().hash(user_data.new_password)
 
     try:
-        db.add(user)
+        await update_returning(db, Users, Users.id == user.id, password=new_hashed_password)
+        await revoke_user_tokens(db, user.id)
         await db.commit()
-        await db.refresh(user)
 
         return {"message": "Password updated successfully"}
     except Exception as e:
@@ -240,7 +236,7 @@ async def delete_user(db: AsyncSession = Depends(get_db), jwt_token: str = Depen
     user_uuid = decoded_token.get("user_id")
 
 
-    result = await db.execute(select(Users).where(Users.id == user_uuid))
+    result = await db.execute(user_by_id, {"user_id": user_uuid})
     user = result.scalar()
 
     if not user:
@@ -252,6 +248,7 @@ async def delete_user(db: AsyncSession = Depends(get_db), jwt_token: str = Depen
 
     try:
         await db.delete(user)
+        await revoke_user_tokens(db, user.id)
         await db.commit()
 
         return {"message": "User deleted successfully."}